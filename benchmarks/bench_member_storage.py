@@ -0,0 +1,152 @@
+"""Insert and lookup timings for org_memberships at increasing table sizes.
+
+Compares per-row ORM inserts with bulk_insert_memberships, then times the
+queries the API runs against the organization index: per-org member counts
+and one page of members for a single job (which reads the snapshots of the
+orgs it references), and the reverse lookup of a login's organizations,
+with and without the org_memberships indexes.
+
+    uv run python benchmarks/bench_member_storage.py --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import Base, Job, JobOrganization, Organization, OrgMembership, bulk_insert_memberships
+
+MEMBERS_PER_ORG = 100
+ORGS_PER_JOB = 10
+_INDEXES = set(OrgMembership.__table__.indexes)
+
+
+def make_members(org_index: int):
+    for i in range(MEMBERS_PER_ORG):
+        yield {
+            'login': f"user{org_index}_{i}",
+            'avatar_url': f"https://avatars.githubusercontent.com/u/{org_index * MEMBERS_PER_ORG + i}",
+            'html_url': f"https://github.com/user{org_index}_{i}",
+            'type': 'User',
+        }
+
+
+def build_database(path: str, rows: int, indexes: bool, bulk: bool) -> float:
+    engine = create_engine(f"sqlite:///{path}")
+    if not indexes:
+        for index in list(OrgMembership.__table__.indexes):
+            OrgMembership.__table__.indexes.discard(index)
+    try:
+        Base.metadata.create_all(engine)
+    finally:
+        OrgMembership.__table__.indexes.update(_INDEXES)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    num_orgs = rows // MEMBERS_PER_ORG
+    now = datetime.datetime.now()
+    started = time.perf_counter()
+    for org_index in range(num_orgs):
+        org = Organization(login=f"org{org_index}", status="found", num_members=MEMBERS_PER_ORG, fetched_at=now)
+        db.add(org)
+        db.flush()
+        if bulk:
+            bulk_insert_memberships(db, org.id, make_members(org_index))  # type: ignore
+        else:
+            for member in make_members(org_index):
+                db.add(OrgMembership(
+                    organization_id=org.id,
+                    login=member['login'],
+                    avatar_url=member['avatar_url'],
+                    html_url=member['html_url'],
+                    member_type=member['type']
+                ))
+        db.commit()
+    elapsed = time.perf_counter() - started
+
+    # Jobs only reference orgs, so adding them is the same for every variant and not timed
+    for job_index in range(max(1, num_orgs // ORGS_PER_JOB)):
+        job_id = f"job-{job_index}"
+        db.add(Job(job_id=job_id, pdf_filename=f"{job_id}.pdf", status="completed"))
+        db.flush()
+        db.execute(insert(JobOrganization), [
+            {
+                'job_id': job_id,
+                'organization': f"org{org_index}",
+                'status': "completed",
+                'num_members': MEMBERS_PER_ORG,
+                'organization_id': org_index + 1,
+            }
+            for org_index in range(job_index * ORGS_PER_JOB, min(num_orgs, (job_index + 1) * ORGS_PER_JOB))
+        ])
+    db.commit()
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+def time_lookups(path: str, rows: int, repeat: int = 20):
+    engine = create_engine(f"sqlite:///{path}")
+    job_id = f"job-{rows // MEMBERS_PER_ORG // ORGS_PER_JOB // 2}"
+    counts_query = (
+        select(JobOrganization.organization, func.count(OrgMembership.id))
+        .join(OrgMembership, OrgMembership.organization_id == JobOrganization.organization_id)
+        .where(JobOrganization.job_id == job_id, JobOrganization.status == "completed")
+        .group_by(JobOrganization.organization)
+    )
+    page_query = (
+        select(OrgMembership.id, OrgMembership.login, JobOrganization.organization)
+        .join(JobOrganization, JobOrganization.organization_id == OrgMembership.organization_id)
+        .where(JobOrganization.job_id == job_id, JobOrganization.status == "completed", OrgMembership.id > 0)
+        .order_by(OrgMembership.id)
+        .limit(100)
+    )
+    login_query = (
+        select(Organization.login)
+        .join(OrgMembership, OrgMembership.organization_id == Organization.id)
+        .where(func.lower(OrgMembership.login) == "user1_1")
+    )
+
+    timings = {}
+    with engine.connect() as conn:
+        for name, query in (("counts", counts_query), ("page", page_query), ("login", login_query)):
+            conn.execute(query).all()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(query).all()
+            timings[name] = (time.perf_counter() - started) / repeat * 1000
+    engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--orm-max", type=int, default=100_000,
+                        help="skip the per-row ORM insert above this many rows (it is slow)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'variant':<14} {'insert s':>9} {'rows/s':>9} {'counts ms':>10} {'page ms':>8} {'login ms':>9}")
+    for rows in args.sizes:
+        variants = [("bulk+indexes", True, True), ("bulk, no index", True, False)]
+        if rows <= args.orm_max:
+            variants.append(("orm+indexes", False, True))
+        for name, bulk, indexes in variants:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.db")
+                insert_seconds = build_database(path, rows, indexes=indexes, bulk=bulk)
+                lookups = time_lookups(path, rows)
+            print(
+                f"{rows:>9} {name:<14} {insert_seconds:>9.2f} {rows / insert_seconds:>9.0f} "
+                f"{lookups['counts']:>10.2f} {lookups['page']:>8.2f} {lookups['login']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Peak RSS of PDF parsing as documents get longer.
+
+Generates documents of increasing page counts (benchmarks/pdf_corpus.py)
+and parses each in a fresh interpreter, in-process and page by page, the
+way a worker thread does: `text` runs extract_text_by_pages, `tables`
+runs extract_content with table extraction. The child reports its peak
+RSS from getrusage, so nothing is missed between samples.
+
+Memory should not grow with the page count: exits non-zero if the peak
+for the longest document exceeds the shortest one's by more than
+--tolerance-mb.
+
+    uv run python benchmarks/bench_pdf_memory.py --pages 100 1000 --modes text tables
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.pdf_corpus import document_pages, write_pdf
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def parse(path: str, mode: str):
+    """Run one parse and print its measurements as JSON (the --child entry point)"""
+    import pdfplumber  # noqa: F401  (imported up front so the baseline includes it)
+    from src.services.pdf_service import PDFService
+
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "tables":
+        pages = len(PDFService.extract_content(path, extract_tables=True))
+    else:
+        pages = len(PDFService.extract_text_by_pages(path))
+    print(json.dumps({
+        'pages': pages,
+        'seconds': time.perf_counter() - started,
+        'baseline_mb': baseline,
+        'peak_mb': _peak_rss_mb(),
+    }))
+
+
+def measure(path: str, mode: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", path, "--modes", mode],
+        env={**os.environ, "PYTHONPATH": ROOT}, cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise RuntimeError(f"parsing {path} failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--modes", nargs="+", choices=["text", "tables"], default=["text", "tables"])
+    parser.add_argument("--tolerance-mb", type=float, default=50.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        parse(args.child, args.modes[0])
+        return
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for num_pages in sorted(args.pages):
+            paths[num_pages] = os.path.join(tmp, f"{num_pages}p.pdf")
+            write_pdf(paths[num_pages], document_pages(0, num_pages, ["org1"], True, random.Random(num_pages)))
+
+        print(f"{'mode':<7} {'pages':>6} {'MB':>7} {'s':>7} {'base MB':>8} {'peak MB':>8} {'growth MB':>10}")
+        for mode in args.modes:
+            peaks = []
+            for num_pages, path in paths.items():
+                stats = measure(path, mode)
+                peaks.append(stats['peak_mb'])
+                print(
+                    f"{mode:<7} {num_pages:>6} {os.path.getsize(path) / 1024 / 1024:>7.1f} {stats['seconds']:>7.1f} "
+                    f"{stats['baseline_mb']:>8.0f} {stats['peak_mb']:>8.0f} {stats['peak_mb'] - stats['baseline_mb']:>10.0f}"
+                )
+            if peaks[-1] - peaks[0] > args.tolerance_mb:
+                print(f"FAIL: {mode}: peak RSS grew by {peaks[-1] - peaks[0]:.0f} MB from "
+                      f"{min(args.pages)} to {max(args.pages)} pages (tolerance {args.tolerance_mb:.0f} MB)")
+                failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
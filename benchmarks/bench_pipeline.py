@@ -0,0 +1,282 @@
+"""End-to-end throughput of the upload -> extract -> GitHub pipeline, offline.
+
+Generates a PDF corpus (benchmarks/pdf_corpus.py), starts a fake GitHub
+server in this process and the API in a subprocess with the Gemini client
+replaced by a stub (benchmarks/fakes.py), then has --concurrency clients
+upload the documents and wait for each job through the long-poll endpoint.
+Everything runs against a temporary database, upload directory and caches,
+so every run starts cold.
+
+Reports jobs/sec, p50/p99 of each processing stage (from the timings the
+API stores per job) and the peak RSS of the API process and its children.
+Exits non-zero if a job failed or throughput is below --min-jobs-per-sec.
+
+    uv run python benchmarks/bench_pipeline.py --documents 40 --concurrency 8 --github-latency 0.05 --llm-latency 0.5
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_upload_latency import free_port
+from benchmarks.fakes import FakeGitHub, StubGenaiClient
+from benchmarks.pdf_corpus import generate_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TERMINAL = ("completed", "failed")
+
+
+def serve(port: int, llm_latency: float):
+    """Run the API in this process with the stub model client (the --serve entry point)"""
+    import uvicorn
+    from src.models.database import create_tables
+    from src.services import llm_service
+
+    create_tables()
+    llm_service._client = StubGenaiClient(llm_latency)  # type: ignore
+    from src.api.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(tmp: str, port: int, github_url: str, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+        "GITHUB_CACHE_PATH": os.path.join(tmp, "github_cache.db"),
+        "LLM_CACHE_PATH": os.path.join(tmp, "llm_cache.db"),
+        "GITHUB_API_URL": github_url,
+        "GITHUB_ACCESS_TOKEN": "benchmark",
+        "GITHUB_ACCESS_TOKENS": "",
+        "WORKER_COUNT": str(args.workers),
+        "JOB_QUEUE_MAX_SIZE": str(max(100, args.documents)),
+        "SIMULATION_DELAY": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port), "--llm-latency", str(args.llm_latency)],
+        env=env, cwd=ROOT
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.HTTPError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children = []
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return children
+
+
+def tree_rss_bytes(pid: int) -> int:
+    """Resident memory of a process and all its descendants, from /proc (0 where /proc is unavailable)"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            continue
+        pending.extend(_children(current))
+    return total
+
+
+def descendants(pid: int) -> List[int]:
+    found = []
+    pending = _children(pid)
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(_children(child))
+    return found
+
+
+def stop_server(server: subprocess.Popen):
+    # PDF parse workers are the server's children; make sure none outlives it
+    children = descendants(server.pid)
+    server.terminate()
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    for child in children:
+        try:
+            os.kill(child, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def sample_rss(pid: int, stop: threading.Event, peak: Dict[str, int], interval: float = 0.05):
+    while not stop.is_set():
+        peak['rss'] = max(peak.get('rss', 0), tree_rss_bytes(pid))
+        stop.wait(interval)
+
+
+def wait_for_job(client: httpx.Client, base: str, job_id: str) -> Dict:
+    after = 0
+    while True:
+        response = client.get(f"{base}/api/documents/status/{job_id}/wait", params={'after': after, 'timeout': 30})
+        response.raise_for_status()
+        body = response.json()
+        after = body['last_seq']
+        statuses = [event['event'] for event in body['events']] + ([body['state']['status']] if body['state'] else [])
+        if any(status in TERMINAL for status in statuses):
+            break
+    # Stage timings are stored just after the terminal event is published
+    for _ in range(50):
+        response = client.get(f"{base}/api/documents/status/{job_id}")
+        response.raise_for_status()
+        status = response.json()
+        if status.get('timings'):
+            break
+        time.sleep(0.02)
+    return status
+
+
+def run_client(base: str, paths: List[str], results: List[Dict], lock: threading.Lock):
+    with httpx.Client(timeout=120) as client:
+        while True:
+            with lock:
+                if not paths:
+                    return
+                path = paths.pop()
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                response = client.post(f"{base}/api/documents/upload", files={"file": (os.path.basename(path), f, "application/pdf")})
+            body = response.json()
+            if "job_id" not in body:
+                status = {'status': "failed", 'error_message': body.get("error") or body.get("detail")}
+            else:
+                status = wait_for_job(client, base, body["job_id"])
+            status['client_seconds'] = time.perf_counter() - started
+            with lock:
+                results.append(status)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def stage_summary(results: List[Dict]) -> Dict[str, Dict[str, float]]:
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for stage, seconds in (result.get('timings') or {}).items():
+            if isinstance(seconds, (int, float)):
+                stages.setdefault(stage, []).append(float(seconds))
+    stages['client'] = [result['client_seconds'] for result in results]
+    return {
+        stage: {'count': len(values), 'p50': percentile(values, 0.5), 'p99': percentile(values, 0.99)}
+        for stage, values in stages.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 60], help="page counts to cycle through")
+    parser.add_argument("--org-pool", type=int, default=200, help="distinct organizations the corpus mentions")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients uploading at once")
+    parser.add_argument("--workers", type=int, default=4, help="WORKER_COUNT of the API")
+    parser.add_argument("--github-latency", type=float, default=0.05, help="seconds per fake GitHub response")
+    parser.add_argument("--github-max-members", type=int, default=250)
+    parser.add_argument("--github-rate-limit", type=int, default=5000)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per stub model call")
+    parser.add_argument("--min-jobs-per-sec", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.llm_latency)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(os.path.join(tmp, "corpus"), args.documents, args.sizes, args.org_pool)
+        github = FakeGitHub(
+            free_port(), latency=args.github_latency, max_members=args.github_max_members, rate_limit=args.github_rate_limit
+        ).start()
+        port = free_port()
+        server = start_server(tmp, port, github.url, args)
+        base = f"http://127.0.0.1:{port}"
+        results: List[Dict] = []
+        peak: Dict[str, int] = {}
+        try:
+            stop = threading.Event()
+            sampler = threading.Thread(target=sample_rss, args=(server.pid, stop, peak), daemon=True)
+            sampler.start()
+            lock = threading.Lock()
+            queue = list(reversed(paths))
+            clients = [threading.Thread(target=run_client, args=(base, queue, results, lock)) for _ in range(args.concurrency)]
+            started = time.perf_counter()
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            stop.set()
+            sampler.join()
+        finally:
+            stop_server(server)
+            github.stop()
+
+    failed = [result for result in results if result.get('status') != "completed"]
+    report = {
+        'documents': len(results),
+        'failed': len(failed),
+        'seconds': round(elapsed, 3),
+        'jobs_per_sec': round(len(results) / elapsed, 3),
+        'peak_rss_mb': round(peak.get('rss', 0) / 1024 / 1024, 1),
+        'stages': stage_summary(results),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['documents']} documents in {report['seconds']:.1f}s: {report['jobs_per_sec']:.2f} jobs/s, "
+              f"{report['failed']} failed, peak RSS {report['peak_rss_mb']:.0f} MB")
+        print(f"{'stage':<16} {'count':>6} {'p50 s':>8} {'p99 s':>8}")
+        for stage, stats in sorted(report['stages'].items()):
+            print(f"{stage:<16} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p99']:>8.3f}")
+
+    if failed:
+        for result in failed[:5]:
+            print(f"FAIL: job {result.get('job_id', '?')}: {str(result.get('error_message'))[:200]}")
+        sys.exit(1)
+    if report['jobs_per_sec'] < args.min_jobs_per_sec:
+        print(f"FAIL: {report['jobs_per_sec']:.2f} jobs/s is below the {args.min_jobs_per_sec} jobs/s minimum")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Import cost of the API process, from `python -X importtime`.
+
+Imports the target module (by default `src.api.main`, what uvicorn loads
+before it can answer /health) in a fresh interpreter several times and
+reports the fastest run, with the packages that took longest. The model,
+PDF and blocking HTTP clients are meant to be imported on first use, so
+none of them may show up at startup.
+
+Exits non-zero if the fastest run exceeds --budget-ms, or if any of the
+deferred packages was imported.
+
+    uv run python benchmarks/bench_startup_imports.py --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a job runs; importing them at startup is a regression
+DEFERRED_PACKAGES = ("google.genai", "pdfplumber", "pdfminer", "requests")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self µs, cumulative µs, nesting depth) of every import made by importing `module`"""
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    # Startup must not depend on credentials either
+    env.pop("GEMINI_API_KEY", None)
+    env.pop("GOOGLE_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise RuntimeError(f"importing {module} failed")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return imports
+
+
+def top_level_packages(imports: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """Cumulative µs per top-level package, counted where another package first imports it"""
+    totals: Dict[str, int] = {}
+    parents: List[str] = []
+    # importtime lists a module after everything it imported; walk backwards to see parents first
+    for name, _, cumulative, depth in reversed(imports):
+        del parents[depth:]
+        package = name.split(".")[0]
+        if not parents or parents[-1] != package:
+            totals[package] = totals.get(package, 0) + cumulative
+        parents.append(package)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.api.main")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to try; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=10, help="packages to list")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    totals = [next(cumulative for name, _, cumulative, _ in reversed(run) if name == args.module) for run in runs]
+    best = runs[totals.index(min(totals))]
+    total_ms = min(totals) / 1000
+
+    print(f"import {args.module}: best {total_ms:.0f} ms, worst {max(totals) / 1000:.0f} ms over {len(runs)} runs")
+    print(f"{'package':<24} {'ms':>8}")
+    for package, micros in sorted(top_level_packages(best).items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<24} {micros / 1000:>8.1f}")
+
+    failed = False
+    imported = {name for name, _, _, _ in best}
+    eager = [package for package in DEFERRED_PACKAGES if package in imported]
+    if eager:
+        print(f"FAIL: imported at startup but meant to load on first use: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: startup imports took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""/health latency while large files are being uploaded.
+
+Starts the API with uvicorn in a subprocess (temporary database and upload
+directory), measures /health on an idle server, then again while several
+clients upload 100 MB files. Uploads go through the full save/hash/job
+path; the queue is kept full by a sleeping job, so most of them end in a
+503 and their files are removed again.
+
+Exits non-zero if the p99 under load is more than --tolerance-ms above the
+idle p99.
+
+    uv run python benchmarks/bench_upload_latency.py --size-mb 100 --uploaders 4 --uploads 3
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_pdf_like(path: str, size_mb: int):
+    # A PDF header followed by noise: enough for the upload path, never parsed
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+
+
+def start_server(tmp: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+        "GITHUB_CACHE_PATH": os.path.join(tmp, "github_cache.db"),
+        "LLM_CACHE_PATH": os.path.join(tmp, "llm_cache.db"),
+        # One worker parked on the first job and a one-slot queue: later uploads are saved, then turned away
+        "WORKER_COUNT": "1",
+        "JOB_QUEUE_MAX_SIZE": "1",
+        "SIMULATION_DELAY": "3600",
+    }
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    subprocess.run(
+        [sys.executable, "-c", "from src.models.database import create_tables; create_tables()"],
+        env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def probe(url: str, stop: threading.Event, interval: float) -> list:
+    latencies = []
+    with httpx.Client(timeout=30) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(interval)
+    return latencies
+
+
+def summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        'samples': len(ordered),
+        'p50': statistics.median(ordered),
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'max': ordered[-1],
+    }
+
+
+def upload(url: str, path: str, count: int, statuses: list):
+    with httpx.Client(timeout=600) as client:
+        for _ in range(count):
+            with open(path, "rb") as f:
+                response = client.post(url, files={"file": ("bench.pdf", f, "application/pdf")})
+            statuses.append(response.status_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--uploaders", type=int, default=4, help="concurrent uploading clients")
+    parser.add_argument("--uploads", type=int, default=3, help="uploads per client")
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="pause between /health probes")
+    parser.add_argument("--tolerance-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        make_pdf_like(pdf_path, args.size_mb)
+        port = free_port()
+        server = start_server(tmp, port)
+        base = f"http://127.0.0.1:{port}"
+        try:
+            stop = threading.Event()
+            result = {}
+            prober = threading.Thread(target=lambda: result.update(idle=probe(f"{base}/health", stop, args.interval)))
+            prober.start()
+            time.sleep(args.idle_seconds)
+            stop.set()
+            prober.join()
+
+            stop = threading.Event()
+            prober = threading.Thread(target=lambda: result.update(load=probe(f"{base}/health", stop, args.interval)))
+            statuses = []
+            uploaders = [
+                threading.Thread(target=upload, args=(f"{base}/api/documents/upload", pdf_path, args.uploads, statuses))
+                for _ in range(args.uploaders)
+            ]
+            started = time.perf_counter()
+            prober.start()
+            for thread in uploaders:
+                thread.start()
+            for thread in uploaders:
+                thread.join()
+            upload_seconds = time.perf_counter() - started
+            stop.set()
+            prober.join()
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    idle, load = summary(result['idle']), summary(result['load'])
+    uploaded_mb = args.size_mb * len(statuses)
+    print(f"uploads: {len(statuses)} x {args.size_mb} MB in {upload_seconds:.1f}s "
+          f"({uploaded_mb / upload_seconds:.0f} MB/s), statuses {sorted(set(statuses))}")
+    print(f"{'/health':<8} {'samples':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in (("idle", idle), ("upload", load)):
+        print(f"{name:<8} {stats['samples']:>8} {stats['p50']:>8.2f} {stats['p99']:>8.2f} {stats['max']:>8.2f}")
+
+    if load['p99'] > idle['p99'] + args.tolerance_ms:
+        print(f"FAIL: p99 under upload load exceeds idle p99 by more than {args.tolerance_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
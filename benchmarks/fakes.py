@@ -0,0 +1,186 @@
+"""Local stand-ins for GitHub and Gemini, so the pipeline can be benchmarked offline.
+
+FakeGitHub serves the two endpoints the services call, /orgs/{org} and
+/orgs/{org}/public_members, with GitHub's pagination (`Link` with
+rel="next"/"last") and rate-limit headers, after a configurable latency.
+Organizations whose name starts with "missing" are a 404. Member counts
+are derived from the org name, so every run sees the same data.
+
+StubGenaiClient answers the name and metadata prompts the way the model
+would, from the `org<N>` names in the prompt, after a configurable latency.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+GITHUB_PAGE_MAX = 100  # GitHub caps per_page at 100
+_ORG_NAME = re.compile(r"\borg\d+\b")
+
+
+def member_count(org: str, max_members: int) -> int:
+    return zlib.crc32(org.encode()) % (max_members + 1)
+
+
+def create_github_app(latency: float = 0.05, max_members: int = 250, rate_limit: int = 5000, reset_seconds: int = 3600):
+    """A FastAPI app answering like api.github.com for the calls GitDigger makes"""
+    from fastapi import FastAPI, Request, Response
+
+    app = FastAPI()
+    budget = {'remaining': rate_limit, 'reset': int(time.time()) + reset_seconds}
+    lock = threading.Lock()
+
+    def rate_headers() -> dict:
+        return {
+            'X-RateLimit-Limit': str(rate_limit),
+            'X-RateLimit-Remaining': str(budget['remaining']),
+            'X-RateLimit-Reset': str(budget['reset']),
+        }
+
+    async def spend() -> Optional[Response]:
+        """Wait out the latency and take one request from the budget; a 403 once it is spent"""
+        await asyncio.sleep(latency)
+        with lock:
+            if time.time() >= budget['reset']:
+                budget['remaining'], budget['reset'] = rate_limit, int(time.time()) + reset_seconds
+            if budget['remaining'] <= 0:
+                return Response(
+                    json.dumps({'message': "API rate limit exceeded"}), status_code=403,
+                    media_type="application/json", headers=rate_headers()
+                )
+            budget['remaining'] -= 1
+        return None
+
+    def not_found() -> Response:
+        return Response(json.dumps({'message': "Not Found"}), status_code=404, media_type="application/json", headers=rate_headers())
+
+    @app.get("/orgs/{org}")
+    async def get_org(org: str):
+        limited = await spend()
+        if limited is not None:
+            return limited
+        if org.startswith("missing"):
+            return not_found()
+        body = {
+            'login': org,
+            'name': org.capitalize(),
+            'public_repos': len(org) * 3,
+            'public_members': member_count(org, max_members),
+            'created_at': "2015-01-01T00:00:00Z",
+            'location': None,
+            'description': f"{org} builds developer tools",
+        }
+        return Response(json.dumps(body), media_type="application/json", headers=rate_headers())
+
+    @app.get("/orgs/{org}/public_members")
+    async def public_members(org: str, request: Request, page: int = 1, per_page: int = 30):
+        limited = await spend()
+        if limited is not None:
+            return limited
+        if org.startswith("missing"):
+            return not_found()
+        per_page = max(1, min(per_page, GITHUB_PAGE_MAX))
+        total = member_count(org, max_members)
+        last_page = max(1, -(-total // per_page))
+        start = (page - 1) * per_page
+        members = [
+            {
+                'login': f"{org}-user{i}",
+                'id': i,
+                'avatar_url': f"https://avatars.example.test/u/{org}/{i}",
+                'html_url': f"https://github.example.test/{org}-user{i}",
+                'type': "User",
+            }
+            for i in range(start, min(total, start + per_page))
+        ]
+        headers = rate_headers()
+        base = str(request.url.remove_query_params(["page", "per_page"]))
+        links = []
+        if page < last_page:
+            links.append(f'<{base}?page={page + 1}&per_page={per_page}>; rel="next"')
+        if last_page > 1:
+            links.append(f'<{base}?page={last_page}&per_page={per_page}>; rel="last"')
+        if links:
+            headers['Link'] = ", ".join(links)
+        return Response(json.dumps(members), media_type="application/json", headers=headers)
+
+    return app
+
+
+class FakeGitHub:
+    """Runs create_github_app with uvicorn on a background thread"""
+
+    def __init__(self, port: int, **options):
+        import uvicorn
+
+        self.url = f"http://127.0.0.1:{port}"
+        config = uvicorn.Config(create_github_app(**options), host="127.0.0.1", port=port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="fake-github", daemon=True)
+
+    def start(self) -> "FakeGitHub":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("fake GitHub server did not start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(10)
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def answer(prompt: str) -> str:
+    """What the model would say to one of GitDigger's prompts"""
+    names: List[str] = list(dict.fromkeys(_ORG_NAME.findall(prompt)))
+    if prompt.startswith("Tell me about"):
+        items = [
+            {
+                'username': name, 'full_name': name.capitalize(), 'description': f"{name} builds developer tools",
+                'website': f"https://{name}.example.test", 'industry': "Software", 'employee_count': 100,
+            }
+            for name in names
+        ]
+        return json.dumps(items[0] if prompt.startswith("Tell me about GitHub org") and items else items)
+    return repr(names)
+
+
+class _Models:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, model: str, contents: str, config=None) -> _Response:
+        time.sleep(self.latency)
+        return _Response(answer(contents))
+
+
+class _AsyncModels:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def generate_content(self, model: str, contents: str, config=None) -> _Response:
+        await asyncio.sleep(self.latency)
+        return _Response(answer(contents))
+
+
+class _Aio:
+    def __init__(self, latency: float):
+        self.models = _AsyncModels(latency)
+
+
+class StubGenaiClient:
+    """The subset of google.genai.Client the services use: models.generate_content, sync and aio"""
+
+    def __init__(self, latency: float = 0.5):
+        self.models = _Models(latency)
+        self.aio = _Aio(latency)
@@ -1,13 +1,54 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes import documents
+from src.api.routes import documents, groups, organizations, system
+from src.services.metrics import render_metrics
+from src.config.config import MAX_UPLOAD_BYTES, MAX_BATCH_UPLOAD_BYTES
 import datetime
+from typing import Dict, Optional
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject uploads whose declared Content-Length is over the limit before the body is read.
+
+    `path_limits` overrides `max_bytes` for specific paths. Bodies without a
+    Content-Length are still capped while the files are saved.
+    """
+
+    def __init__(self, app, max_bytes: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            headers = dict(scope["headers"])
+            length = headers.get(b"content-length", b"")
+            limit = self.path_limits.get(scope["path"], self.max_bytes)
+            if length.isdigit() and int(length) > limit:
+                response = JSONResponse({"detail": f"Request body is larger than {limit} bytes"}, status_code=413)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    documents.job_queue.start()
+    documents.job_queue.recover()
+    yield
+    documents.job_queue.stop()
 
 
 app = FastAPI(
     title="GitDigger API",
     description="PDF to GitHub company data extraction service",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 
@@ -20,8 +61,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+    path_limits={"/api/groups/upload": MAX_BATCH_UPLOAD_BYTES + MULTIPART_OVERHEAD}
+)
+
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
+app.include_router(groups.router, prefix="/api/groups", tags=["groups"])
+app.include_router(organizations.router, prefix="/api/organizations", tags=["organizations"])
+app.include_router(system.router, prefix="/api/system", tags=["system"])
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"} # type: ignore
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage job timing histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,26 +1,52 @@
-from fastapi import UploadFile, File, APIRouter, Depends, HTTPException, Path
+from fastapi import UploadFile, File, APIRouter, Depends, Header, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import func, insert, literal, select
 from sqlalchemy.orm import Session
-import shutil
+import asyncio
+import csv
+import hashlib
+import io
 import uuid
 import os
-import threading
 import datetime
 import time
 import json
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, List, Optional, Dict, Any, Tuple
 
-from src.models.database import Job, GitHubMember
-from src.models.database import get_db
-from src.services.pdf_service import PDFService
-from src.services.llm_service import github_name_extractor
-from src.services.github_service import GitHubService
-from src.config.config import UPLOAD_DIR, SIMULATION_DELAY
+from src.models.database import Job, JobOrganization, OrgMembership
+from src.models.database import get_db, run_in_transaction, update_job
+from src.services.pdf_service import ParseBudget, get_pdf_service
+from src.services.llm_service import github_name_extractor_chunked, has_candidate_signal
+from src.services.handle_extractor import find_github_handles, extraction_stats, pages_without_handles
+from src.services.github_service import AsyncGitHubService
+from src.services.org_index import lookup_organizations, org_refresher, snapshot_status, store_organization
+from src.services.job_queue import JobQueue, JobDeferred, LeaseLost, QueueFullError
+from src.services.db_queue import DatabaseJobQueue, check_lease, lease_lost
+from src.services.rate_limit import RateLimitExceeded
+from src.services.metrics import StageTimer
+from src.services.event_bus import TERMINAL_EVENTS, job_events
+from src.config.config import (
+    UPLOAD_DIR,
+    UPLOAD_CHUNK_SIZE,
+    MAX_UPLOAD_BYTES,
+    MEMBERS_PAGE_MAX,
+    EXPORT_CHUNK_SIZE,
+    SIMULATION_DELAY,
+    JOB_MAX_DEFERRALS,
+    HANDLE_FAST_PATH_ENABLED,
+    PDF_PARALLEL_MIN_PAGES,
+    EVENT_KEEPALIVE_SECONDS,
+    LONG_POLL_MAX_TIMEOUT,
+    JOB_QUEUE_BACKEND,
+    ORG_INDEX_ENABLED,
+)
 
 router = APIRouter()
 
 
 class MemberResponse(BaseModel):
+    id: Optional[int] = None
     login: str
     avatar_url: Optional[str] = None
     html_url: Optional[str] = None
@@ -28,54 +54,202 @@ class MemberResponse(BaseModel):
     organization: Optional[str] = None
 
 
+class OrganizationStatus(BaseModel):
+    organization: str
+    status: str  # pending, completed, not_found, failed
+    num_members: Optional[int] = None
+    error_message: Optional[str] = None
+
+
 class StatusResponse(BaseModel):
     job_id: str
     status: str
     company_name: Optional[str] = None
     num_members: Optional[int] = None
-    github_members: Optional[List[MemberResponse]] = None
+    member_counts: Optional[Dict[str, int]] = None  # members stored so far per organization
+    organizations: Optional[List[OrganizationStatus]] = None  # progress of each extracted organization
     error_message: Optional[str] = None
+    timings: Optional[Dict[str, Any]] = None  # seconds per processing stage of the latest run
+
+
+class MembersPage(BaseModel):
+    job_id: str
+    members: List[MemberResponse]
+    next_after_id: Optional[int] = None  # None once the last page has been returned
+
+
+MEMBER_COLUMNS = ['id', 'login', 'avatar_url', 'html_url', 'member_type', 'organization']
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded MAX_UPLOAD_BYTES while it was being saved"""
+
+
+class NotAPDF(Exception):
+    """The upload does not start with a PDF header"""
+
+
+# PDF readers accept the header anywhere in the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_WINDOW = 1024
 
 
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_document(file: UploadFile = File(...)):
     if file.content_type != 'application/pdf':
         return {"error": "Invalid file type. Please upload a PDF document."}
     
     job_id = str(uuid.uuid4())
+    original_filename, file_path = _upload_path(file.filename, job_id)
     
+    # Disk and database work runs in the threadpool so a large upload never stalls the event loop
+    try:
+        content_hash = await asyncio.to_thread(_save_upload, file.file, file_path)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File is larger than {MAX_UPLOAD_BYTES} bytes")
+    except NotAPDF:
+        return {"error": "Invalid file type. Please upload a PDF document."}
+    except Exception as e:
+        return {"error": f"Failed to save file: {str(e)}"}
+    
+    try:
+        if await asyncio.to_thread(_reuse_or_create_job, job_id, original_filename, file_path, content_hash):
+            return {"job_id": job_id}
+        
+        job_queue.submit(job_id, file_path)
+        
+    except QueueFullError as e:
+        # Lost the race for the last slot; drop the job rather than leave it stranded
+        await asyncio.to_thread(_discard_job, job_id, file_path)
+        raise _queue_full(e)
+    except Exception as e:
+        return {"error": f"Failed to save file: {str(e)}"}
+    
+    return {"job_id": job_id}
+
+
+def _upload_path(filename: Optional[str], job_id: str) -> Tuple[str, str]:
+    """The original filename (with a .pdf extension) and a unique path to store the upload under"""
     # Use original filename, handle potential conflicts
-    original_filename = file.filename or "document.pdf"
+    original_filename = os.path.basename(filename or "") or "document.pdf"
     if not original_filename.endswith('.pdf'):
         original_filename += '.pdf'
     
     # Create a unique filename to avoid conflicts while preserving original name
     timestamp = int(time.time())
     name_without_ext = original_filename[:-4]  # Remove .pdf extension
-    unique_filename = f"{name_without_ext}_{timestamp}.pdf"
-    file_path = f"{UPLOAD_DIR}/{unique_filename}"
-    
+    unique_filename = f"{name_without_ext}_{timestamp}_{job_id[:8]}.pdf"
+    return original_filename, f"{UPLOAD_DIR}/{unique_filename}"
+
+
+def _save_upload(source: BinaryIO, file_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """Copy an uploaded stream to disk in chunks, returning its SHA-256 hex digest.
+
+    Size (at most `max_bytes`) and PDF header are checked in the same pass;
+    on failure the partial file is removed and UploadTooLarge or NotAPDF is raised.
+    """
+    digest = hashlib.sha256()
+    size = 0
     try:
         with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        new_job = Job(
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                if size == 0 and PDF_MAGIC not in chunk[:PDF_HEADER_WINDOW]:
+                    raise NotAPDF()
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                buffer.write(chunk)
+        if size == 0:
+            raise NotAPDF()
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return digest.hexdigest()
+
+
+def _reuse_or_create_job(job_id: str, pdf_filename: str, file_path: str, content_hash: str) -> bool:
+    """Register the upload as a job. Returns True if it was answered from an identical earlier upload."""
+    def _create(db: Session) -> bool:
+        previous_job = _find_completed_job(db, content_hash)
+        if previous_job:
+            # Byte-identical to a document we already processed: answer from its results
+            _reuse_job_results(db, job_id, pdf_filename, previous_job)
+            return True
+        
+        job_queue.ensure_capacity()
+        
+        db.add(Job(
             job_id=job_id,
-            pdf_filename=original_filename,  # Store original filename in database
+            pdf_filename=pdf_filename,  # Store original filename in database
+            pdf_path=file_path,
+            content_hash=content_hash,
             status="pending",
             created_at=datetime.datetime.now()
-        )
-        db.add(new_job)
-        db.commit()
-        
-        thread = threading.Thread(target=process_pdf, args=(job_id, file_path))
-        thread.daemon = True
-        thread.start()
-        
-    except Exception as e:
-        return {"error": f"Failed to save file: {str(e)}"}
+        ))
+        return False
     
-    return {"job_id": job_id}
+    reused = run_in_transaction(_create)
+    if reused:
+        os.remove(file_path)
+    return reused
+
+
+def _discard_job(job_id: str, file_path: str):
+    run_in_transaction(lambda db: db.query(Job).filter(Job.job_id == job_id).delete())
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def _find_completed_job(db: Session, content_hash: str) -> Optional[Job]:
+    return (
+        db.query(Job)
+        .filter(Job.content_hash == content_hash, Job.status == "completed")
+        .order_by(Job.completed_at.desc())
+        .first()
+    )
+
+
+def _reuse_job_results(db: Session, job_id: str, pdf_filename: str, previous_job: Job, group_id: Optional[str] = None):
+    """Create an already-completed job referencing previous_job's organizations; the caller commits"""
+    now = datetime.datetime.now()
+    db.add(Job(
+        job_id=job_id,
+        pdf_filename=pdf_filename,
+        pdf_path=previous_job.pdf_path,
+        content_hash=previous_job.content_hash,
+        status="completed",
+        company_name=previous_job.company_name,
+        num_members=previous_job.num_members,
+        created_at=now,
+        completed_at=now,
+        group_id=group_id
+    ))
+    db.flush()
+    
+    org_columns = ['organization', 'status', 'num_members', 'error_message', 'completed_at', 'organization_id']
+    db.execute(
+        insert(JobOrganization).from_select(
+            ['job_id', *org_columns],
+            select(
+                literal(job_id),
+                *(getattr(JobOrganization, column) for column in org_columns)
+            ).where(JobOrganization.job_id == previous_job.job_id).order_by(JobOrganization.id)
+        )
+    )
+
+
+def _queue_full(error: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={
+            "error": "Too many documents are being processed. Please retry later.",
+            "queue_depth": error.depth,
+            "queue_capacity": error.capacity,
+        },
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
 
 @router.get("/status/{job_id}", response_model=StatusResponse)
@@ -90,132 +264,568 @@ async def check_status(job_id: str = Path(...), db: Session = Depends(get_db)):
         status=str(job.status),
         company_name=str(job.company_name) if job.company_name else None,  # type: ignore
         num_members=job.num_members if hasattr(job, 'num_members') else None,  # type: ignore
-        error_message=str(job.error_message) if job.error_message else None # type: ignore
+        error_message=str(job.error_message) if job.error_message else None, # type: ignore
+        timings=json.loads(job.stage_timings) if job.stage_timings else None # type: ignore
     )
     
-    if str(job.status) == "completed" and job.company_name: # type: ignore
-        members = db.query(GitHubMember).filter(GitHubMember.job_id == job_id).all()
-        
-        if members:
-            member_list = []
-            for member in members:
-                member_list.append(
-                    MemberResponse(
-                        login=str(member.login),
-                        avatar_url=str(member.avatar_url) if member.avatar_url else None, # type: ignore
-                        html_url=str(member.html_url) if member.html_url else None,     # type: ignore
-                        member_type=str(member.member_type) if member.member_type else None, # type: ignore
-                        organization=str(member.organization) if member.organization else None # type: ignore
-                    )
-                )
-            response.github_members = member_list
+    organizations = (
+        db.query(JobOrganization)
+        .filter(JobOrganization.job_id == job_id)
+        .order_by(JobOrganization.id)
+        .all()
+    )
+    if organizations:
+        response.organizations = [
+            OrganizationStatus(
+                organization=str(org.organization),
+                status=str(org.status),
+                num_members=org.num_members,  # type: ignore
+                error_message=org.error_message  # type: ignore
+            )
+            for org in organizations
+        ]
+    
+    if organizations or (str(job.status) == "completed" and job.company_name): # type: ignore
+        # Counts only, including partial results of a running job; the members themselves are paged through /members or /export
+        counts = (
+            db.query(JobOrganization.organization, func.count(OrgMembership.id))
+            .join(OrgMembership, OrgMembership.organization_id == JobOrganization.organization_id)
+            .filter(JobOrganization.job_id == job_id, JobOrganization.status == "completed")
+            .group_by(JobOrganization.organization)
+            .all()
+        )
+        response.member_counts = {organization: count for organization, count in counts}
     
     return response
 
 
-def process_pdf(job_id: str, pdf_path: str):
+@router.get("/status/{job_id}/members", response_model=MembersPage)
+async def list_members(
+    job_id: str = Path(...),
+    limit: int = Query(100, ge=1, le=MEMBERS_PAGE_MAX),
+    after_id: int = Query(0, ge=0),
+    organization: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """One page of a job's members, ordered by id. Pass `next_after_id` back as `after_id` for the next page."""
+    if not db.query(Job.job_id).filter(Job.job_id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    query = _members_query(job_id, after_id, organization).limit(limit)
+    members = [MemberResponse(**row._mapping) for row in db.execute(query)]
+    
+    return MembersPage(
+        job_id=job_id,
+        members=members,
+        next_after_id=members[-1].id if len(members) == limit else None
+    )
+
+
+@router.get("/status/{job_id}/export")
+async def export_members(
+    job_id: str = Path(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    organization: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stream every member of a job as NDJSON or CSV, read from the database in chunks"""
+    if not db.query(Job.job_id).filter(Job.job_id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(job_id, organization),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{job_id}.csv"'}
+        )
+    return StreamingResponse(_export_ndjson(job_id, organization), media_type="application/x-ndjson")
+
+
+def _members_query(job_id: str, after_id: int, organization: Optional[str]):
+    """A job's members are those of the org snapshots it references, in membership id order"""
+    query = (
+        select(
+            *(getattr(OrgMembership, column) for column in MEMBER_COLUMNS if column != 'organization'),
+            JobOrganization.organization
+        )
+        .join(JobOrganization, JobOrganization.organization_id == OrgMembership.organization_id)
+        .where(JobOrganization.job_id == job_id, JobOrganization.status == "completed", OrgMembership.id > after_id)
+        .order_by(OrgMembership.id)
+    )
+    if organization:
+        query = query.where(JobOrganization.organization == organization)
+    return query
+
+
+def _iter_member_rows(job_id: str, organization: Optional[str]):
+    """Yield member rows in EXPORT_CHUNK_SIZE keyset-paginated batches, on a session of its own"""
+    from src.models.database import SessionLocal
+    db = SessionLocal()
+    try:
+        after_id = 0
+        while True:
+            rows = db.execute(_members_query(job_id, after_id, organization).limit(EXPORT_CHUNK_SIZE)).all()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1].id
+    finally:
+        db.close()
+
+
+def _export_ndjson(job_id: str, organization: Optional[str]):
+    for rows in _iter_member_rows(job_id, organization):
+        yield "".join(json.dumps(dict(row._mapping)) + "\n" for row in rows)
+
+
+def _export_csv(job_id: str, organization: Optional[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(MEMBER_COLUMNS)
+    for rows in _iter_member_rows(job_id, organization):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _job_state(job_id: str) -> Optional[Dict[str, Any]]:
+    """Current status columns of a job as a status event, read on a short-lived session of its own"""
     from src.models.database import SessionLocal
     db = SessionLocal()
-    
     try:
         job = db.query(Job).filter(Job.job_id == job_id).first()
         if not job:
+            return None
+        return {
+            'job_id': job_id,
+            'event': 'status',
+            'status': str(job.status),
+            'company_name': job.company_name,
+            'num_members': job.num_members,
+            'error_message': job.error_message,
+        }
+    finally:
+        db.close()
+
+
+def _sse(message: Dict[str, Any]) -> str:
+    lines = []
+    if message.get('seq'):
+        lines.append(f"id: {message['seq']}")
+    lines.append(f"event: {message['event']}")
+    lines.append(f"data: {json.dumps(message, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/status/{job_id}/events")
+async def stream_events(job_id: str = Path(...), last_event_id: Optional[str] = Header(None)):
+    """Server-sent events for a job: its current status, then every state change until it finishes.
+
+    Reconnecting clients send Last-Event-ID to resume after the last event they saw.
+    """
+    state = await asyncio.to_thread(_job_state, job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    async def events():
+        yield _sse(state)
+        if state['status'] in TERMINAL_EVENTS and not job_events.history(job_id, after):
             return
-            
-        setattr(job, 'status', 'processing')
-        db.commit()
-        
-        time.sleep(SIMULATION_DELAY)
-        
-        pdf_service = PDFService()
-        pdf_text = pdf_service.extract_text(pdf_path)
-        
-        if not pdf_text:
-            job = db.query(Job).filter(Job.job_id == job_id).first()
-            if job:
-                setattr(job, 'status', 'failed')
-                setattr(job, 'error_message', 'Failed to extract text from PDF')
-                setattr(job, 'completed_at', datetime.datetime.now())
-                db.commit()
+        async for message in job_events.subscribe(job_id, after, keepalive=EVENT_KEEPALIVE_SECONDS):
+            if message is not None:
+                yield _sse(message)
+                continue
+            # Quiet for a while: fall back to the table in case the job finished where we could not see it
+            current = await asyncio.to_thread(_job_state, job_id)
+            if current is None or current['status'] in TERMINAL_EVENTS:
+                if current is not None:
+                    yield _sse(current)
+                return
+            yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/status/{job_id}/wait")
+async def wait_for_events(
+    job_id: str = Path(...),
+    after: int = Query(0, ge=0),
+    timeout: float = Query(30, gt=0, le=LONG_POLL_MAX_TIMEOUT)
+):
+    """Long-poll: return the job's events after sequence `after`, waiting up to `timeout` seconds for one.
+
+    Pass the returned `last_seq` as `after` on the next call. `events` is
+    empty if nothing happened in time; `state` is the job's current row.
+    """
+    events = job_events.history(job_id, after)
+    state = None
+    if not events:
+        state = await asyncio.to_thread(_job_state, job_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if state['status'] not in TERMINAL_EVENTS:
+            subscription = job_events.subscribe(job_id, after, keepalive=timeout)
+            try:
+                message = await anext(subscription)
+            finally:
+                await subscription.aclose()
+            if message is not None:
+                events = [message] + job_events.history(job_id, message['seq'])
+    
+    return {
+        'job_id': job_id,
+        'events': events,
+        'last_seq': events[-1]['seq'] if events else after,
+        'state': state if not events else None,
+    }
+
+
+def _organization_statuses(job_id: str) -> Dict[str, str]:
+    """Organizations already registered for a job, in extraction order, with their status"""
+    def _load(db: Session) -> Dict[str, str]:
+        rows = (
+            db.query(JobOrganization.organization, JobOrganization.status)
+            .filter(JobOrganization.job_id == job_id)
+            .order_by(JobOrganization.id)
+            .all()
+        )
+        return {organization: status for organization, status in rows}
+    return run_in_transaction(_load)
+
+
+def _register_organizations(job_id: str, org_names: List[str]):
+    def _register(db: Session):
+        db.execute(insert(JobOrganization), [
+            {'job_id': job_id, 'organization': org_name, 'status': 'pending'}
+            for org_name in org_names
+        ])
+    run_in_transaction(_register)
+
+
+def _save_organization(job_id: str, org_name: str, org_data: Dict, organization_id: Optional[int] = None) -> int:
+    """Commit one organization's outcome for a job, pointing it at the org's snapshot; returns its member count"""
+    status = {"found": "completed", "not_found": "not_found"}.get(snapshot_status(org_data) or "", "failed")
+    error_message = org_data.get('error') if status == "failed" else None
+    if status == "failed":
+        print(f"Error processing organization {org_name}: {error_message}")
+    num_members = org_data.get('num_members', 0) if status == "completed" else 0
+    
+    def _save(db: Session):
+        updated = db.query(JobOrganization).filter(
+            JobOrganization.job_id == job_id,
+            JobOrganization.organization == org_name,
+            JobOrganization.status == "pending"
+        ).update({
+            'status': status,
+            'num_members': num_members,
+            'error_message': error_message,
+            'completed_at': datetime.datetime.now(),
+            'organization_id': organization_id
+        })
+        # Counted once even if a resumed job saves the same org again
+        if updated:
+            db.query(Job).filter(Job.job_id == job_id).update({'num_members': func.coalesce(Job.num_members, 0) + num_members})
+    
+    run_in_transaction(_save)
+    if status == "completed":
+        print(f"Found {num_members} members for organization: {org_name}")
+    return num_members
+
+
+async def fetch_organizations(
+    job_id: str,
+    org_names: List[str],
+    timer: Optional[StageTimer] = None
+) -> Dict[str, Dict]:
+    """Fetch organizations concurrently, committing each one's results as soon as it arrives"""
+    return await fetch_organizations_for_jobs(job_id, {org_name: [job_id] for org_name in org_names}, timer)
+
+
+async def fetch_organizations_for_jobs(
+    owner_id: str,
+    jobs_by_org: Dict[str, List[str]],
+    timer: Optional[StageTimer] = None
+) -> Dict[str, Dict]:
+    """Resolve each organization once and commit its results to every job that mentions it.
+
+    Orgs with a usable snapshot in the organization index are answered from
+    it (stale ones are refreshed in the background); the rest are fetched
+    from GitHub and stored in the index. `owner_id` is the job (or job group)
+    the GitHub rate-limit share is accounted to.
+    """
+    totals: Dict[str, int] = {}
+    for job_ids in jobs_by_org.values():
+        for job_id in job_ids:
+            totals[job_id] = totals.get(job_id, 0) + 1
+    finished = {job_id: 0 for job_id in totals}
+    org_seconds = {}
+    # One writer at a time; concurrent SQLite writes would only queue on the database lock
+    persist_lock = asyncio.Lock()
+    
+    async def _attach(org_name: str, org_data: Dict, organization_id: Optional[int]):
+        check_lease()
+        for job_id in jobs_by_org[org_name]:
+            async with persist_lock:
+                started = time.perf_counter()
+                await asyncio.to_thread(_save_organization, job_id, org_name, org_data, organization_id)
+                if timer is not None:
+                    timer.record('db_persist', time.perf_counter() - started)
+            finished[job_id] += 1
+            job_events.publish(
+                job_id,
+                "organization",
+                organization=org_name,
+                success=bool(org_data.get('success')),
+                num_members=org_data.get('num_members', 0),
+                finished=finished[job_id],
+                total=totals[job_id]
+            )
+    
+    async def _persist(org_name: str, org_data: Dict):
+        async with persist_lock:
+            started = time.perf_counter()
+            organization_id = await asyncio.to_thread(store_organization, org_name, org_data)
+            if timer is not None:
+                timer.record('db_persist', time.perf_counter() - started)
+        await _attach(org_name, org_data, organization_id)
+    
+    results: Dict[str, Dict] = {}
+    if ORG_INDEX_ENABLED:
+        started = time.perf_counter()
+        indexed = await asyncio.to_thread(lookup_organizations, list(jobs_by_org))
+        if timer is not None:
+            timer.record('org_index', time.perf_counter() - started)
+        stale = [org_name for org_name, snapshot in indexed.items() if snapshot.stale]
+        if stale:
+            org_refresher.request(stale)
+        for org_name, snapshot in indexed.items():
+            results[org_name] = snapshot.as_result()
+            await _attach(org_name, results[org_name], snapshot.id)
+    
+    remaining = [org_name for org_name in jobs_by_org if org_name not in results]
+    if not remaining:
+        return results
+    try:
+        async with AsyncGitHubService(job_id=owner_id) as github_service:
+            results.update(await github_service.get_organizations_data(  # Uses default max_members=1000
+                remaining, timings=org_seconds, on_result=_persist
+            ))
+        return results
+    finally:
+        if timer is not None:
+            timer.record_orgs(org_seconds)
+
+
+def _fail_job(job_id: str, error_message: str):
+    update_job(job_id, status="failed", error_message=error_message, completed_at=datetime.datetime.now())
+    job_events.publish(job_id, "failed", status="failed", error_message=error_message)
+
+
+def _save_timings(job_id: str, timer: StageTimer, status: str):
+    try:
+        update_job(job_id, stage_timings=json.dumps(timer.finish(status)))
+    except Exception as e:
+        print(f"Failed to store stage timings for job {job_id}: {e}")
+
+
+def _cached_triage(job_id: str) -> Optional[Dict]:
+    """The page triage stored for this job, or for an earlier upload of the same file"""
+    def _load(db: Session) -> Optional[str]:
+        job = db.query(Job.content_hash, Job.page_triage).filter(Job.job_id == job_id).first()
+        if job is None:
+            return None
+        if job.page_triage or not job.content_hash:
+            return job.page_triage
+        return (
+            db.query(Job.page_triage)
+            .filter(Job.content_hash == job.content_hash, Job.page_triage.isnot(None))
+            .limit(1)
+            .scalar()
+        )
+    
+    triage = run_in_transaction(_load)
+    return json.loads(triage) if triage else None
+
+
+def _save_triage(job_id: str, triage: Dict):
+    try:
+        update_job(job_id, page_triage=json.dumps(triage))
+    except Exception as e:
+        print(f"Failed to store page triage for job {job_id}: {e}")
+
+
+def _extract_organizations(
+    job_id: str,
+    pdf_path: str,
+    timer: StageTimer,
+    min_parallel_pages: int = PDF_PARALLEL_MIN_PAGES
+) -> List[str]:
+    pdf_service = get_pdf_service()
+    # Triage reads only page resources: scanned documents fail here, and pages without fonts are never laid out
+    with timer.stage('pdf_triage'):
+        triage = _cached_triage(job_id)
+        if triage is None:
+            triage = pdf_service.triage(pdf_path)
+            _save_triage(job_id, triage)
+    if not triage['text_pages']:
+        raise ValueError(f"No text layer in PDF ({len(triage['image_pages'])} of {triage['pages']} pages are images only)")
+    
+    with timer.stage('pdf_parse'):
+        pages = pdf_service.extract_text_by_pages(
+            pdf_path,
+            parallel=True,
+            min_parallel_pages=min_parallel_pages,
+            page_numbers=triage['text_pages'],
+            budget=ParseBudget.for_file(pdf_path)
+        )
+        links = pdf_service.extract_links(pdf_path) if pages else []
+    
+    if not pages:
+        # Not cached: fonts but no text may be a transient parse failure, and a re-upload should parse again
+        raise ValueError("Failed to extract text from PDF")
+    if 'ranked' not in triage:
+        _save_triage(job_id, {**triage, 'text_pages': sorted(pages), 'ranked': pdf_service.rank_pages(pages)})
+    
+    # Explicit github.com links are unambiguous, but one footer link says nothing about the rest of the
+    # document: the LLM still reads every page that looks like it names companies without linking them
+    github_usernames = find_github_handles([*pages.values(), *links]) if HANDLE_FAST_PATH_ENABLED else []
+    uncovered = pages
+    if github_usernames:
+        uncovered = {number: text for number, text in pages_without_handles(pages).items() if has_candidate_signal(text)}
+    extraction_stats.record(fast_path=not uncovered, merged=bool(github_usernames))
+    if uncovered:
+        # Map the extractor over the uncovered pages, within the job's token budget
+        with timer.stage('llm_extract'):
+            extracted = github_name_extractor_chunked(uncovered, page_order=pdf_service.rank_pages(uncovered))
+        known = {handle.lower() for handle in github_usernames}
+        github_usernames += [name for name in dict.fromkeys(extracted) if name.lower() not in known]
+    
+    if not github_usernames:
+        raise ValueError("No GitHub organizations found in the document")
+    return github_usernames
+
+
+def _complete_job(job_id: str) -> bool:
+    """Mark a job whose organizations are all done as completed, or failed if none was found"""
+    def _complete(db: Session) -> Optional[Tuple[str, int]]:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        if not job:
+            return None
+        completed = (
+            db.query(JobOrganization)
+            .filter(JobOrganization.job_id == job_id, JobOrganization.status == "completed")
+            .order_by(JobOrganization.id)
+            .all()
+        )
+        if not completed:
+            return None
+        company_name = ", ".join(str(org.organization) for org in completed)
+        total_members = sum(org.num_members or 0 for org in completed)
+        job.company_name = company_name  # Store all successful org names  # type: ignore
+        job.num_members = total_members  # type: ignore
+        job.status = "completed"    # type: ignore
+        job.completed_at = datetime.datetime.now()  # type: ignore
+        return company_name, total_members
+    
+    result = run_in_transaction(_complete)
+    if result is None:
+        _fail_job(job_id, "No valid GitHub organizations found")
+        return False
+    
+    company_name, total_members = result
+    job_events.publish(job_id, "completed", status="completed", company_name=company_name, num_members=total_members)
+    print(f"Successfully processed {company_name} with {total_members} total members")
+    return True
+
+
+def process_pdf(job_id: str, pdf_path: str, queue_wait: float = 0.0):
+    timer = StageTimer()
+    timer.record('queue_wait', queue_wait)
+    status = "failed"
+    try:
+        if not update_job(job_id, status="processing"):
             return
+        job_events.publish(job_id, "processing", status="processing")
         
-        github_usernames = github_name_extractor(pdf_text)
+        if SIMULATION_DELAY:
+            time.sleep(SIMULATION_DELAY)
         
-        if not github_usernames:
-            job = db.query(Job).filter(Job.job_id == job_id).first()
-            if job:
-                job.status = "failed"   # type: ignore
-                job.error_message = "No GitHub organizations found in the document" # type: ignore
-                job.completed_at = datetime.datetime.now() # type: ignore
-                db.commit()
-            return
+        # A resumed job already knows its organizations; only the unfinished ones are fetched again
+        organizations = _organization_statuses(job_id)
+        if organizations:
+            github_usernames = list(organizations)
+        else:
+            try:
+                github_usernames = _extract_organizations(job_id, pdf_path, timer)
+            except ValueError as e:
+                check_lease()
+                _fail_job(job_id, str(e))
+                return
+            check_lease()
+            _register_organizations(job_id, github_usernames)
+            organizations = {org_name: "pending" for org_name in github_usernames}
+        job_events.publish(job_id, "organizations", organizations=github_usernames)
         
-        # Try each GitHub organization until we find ones that exist
-        all_members = []
-        successful_orgs = []
-        total_members = 0
+        remaining = [org_name for org_name, org_status in organizations.items() if org_status == "pending"]
+        if remaining:
+            if len(remaining) < len(organizations):
+                print(f"Resuming job {job_id}: {len(remaining)} of {len(organizations)} organizations left")
+            # Fetch the organizations concurrently; each one is committed as soon as it is done
+            with timer.stage('github_fetch'):
+                asyncio.run(fetch_organizations(job_id, remaining, timer))
         
-        for org_name in github_usernames:
-            try:
-                github_service = GitHubService()
-                org_data = github_service.get_organization_data(org_name)  # Uses default max_members=1000
-                
-                if org_data["success"]:
-                    successful_orgs.append(org_name)
-                    members = org_data["github_members"]
-                    
-                    # Add organization name to each member
-                    for member in members:
-                        member['organization'] = org_name
-                    
-                    all_members.extend(members)
-                    total_members += org_data.get("num_members", len(members))
-                    
-                    print(f"Found {len(members)} members for organization: {org_name}")
-                    
-            except Exception as e:
-                print(f"Error processing organization {org_name}: {str(e)}")
-                continue
+        check_lease()
+        if _complete_job(job_id):
+            status = "completed"
+    
+    except LeaseLost:
+        raise
+    
+    except RateLimitExceeded as e:
+        # Out of GitHub budget: put the job back rather than holding this worker until the reset.
+        # Organizations finished so far stay committed and are skipped when it resumes.
+        check_lease()
         
-        if not successful_orgs:
+        def _defer(db: Session) -> bool:
             job = db.query(Job).filter(Job.job_id == job_id).first()
-            if job:
-                job.status = "failed"   # type: ignore
-                job.error_message = "No valid GitHub organizations found"  # type: ignore
-                job.completed_at = datetime.datetime.now()   # type: ignore
-                db.commit()
-            return
+            if not job:
+                return False
+            if (job.deferrals or 0) >= JOB_MAX_DEFERRALS:  # type: ignore
+                job.status = "failed"  # type: ignore
+                job.error_message = str(e)  # type: ignore
+                job.completed_at = datetime.datetime.now()  # type: ignore
+                return False
+            # All in one commit: a pending job without available_at would be claimed again straight away
+            job.status = "pending"  # type: ignore
+            job.deferrals = (job.deferrals or 0) + 1  # type: ignore
+            job.available_at = datetime.datetime.now() + datetime.timedelta(seconds=e.retry_after)  # type: ignore
+            job.lease_owner = None  # type: ignore
+            job.lease_expires_at = None  # type: ignore
+            return True
         
-        # Update job with results from all successful organizations
-        job = db.query(Job).filter(Job.job_id == job_id).first()
-        if job:
-            job.company_name = ", ".join(successful_orgs)  # Store all successful org names  # type: ignore
-            job.status = "completed"    # type: ignore
-            job.completed_at = datetime.datetime.now()  # type: ignore
-            job.num_members = total_members  # type: ignore
-            
-            # Add all members to database
-            for member in all_members:
-                db_member = GitHubMember(
-                    job_id=job_id,
-                    login=member.get('login', ''),
-                    avatar_url=member.get('avatar_url', ''),
-                    html_url=member.get('html_url', ''),
-                    member_type=member.get('type', ''),
-                    organization=member.get('organization', '')  # Add organization info
-                )
-                db.add(db_member)
-            
-            db.commit()
-            print(f"Successfully processed {len(successful_orgs)} organizations with {len(all_members)} total members")
-            
+        if run_in_transaction(_defer):
+            status = "deferred"
+            job_events.publish(job_id, "deferred", status="pending", retry_after=e.retry_after)
+            raise JobDeferred(e.retry_after)
+        job_events.publish(job_id, "failed", status="failed", error_message=str(e))
+    
     except Exception as e:
-        job = db.query(Job).filter(Job.job_id == job_id).first() 
-        if job:
-            job.status = "failed" # type: ignore
-            job.error_message = str(e) # type: ignore
-            job.completed_at = datetime.datetime.now() # type: ignore
-            db.commit()
+        check_lease()
+        _fail_job(job_id, str(e))
     
     finally:
-        db.close()
+        if not lease_lost():
+            _save_timings(job_id, timer, status)
+
+
+# With the database backend, API processes only accept jobs (unless API_WORKER_THREADS is set)
+# and src/worker.py processes run them
+job_queue = DatabaseJobQueue(process_pdf) if JOB_QUEUE_BACKEND == "database" else JobQueue(process_pdf)
@@ -0,0 +1,455 @@
+from fastapi import UploadFile, File, APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import csv
+import datetime
+import io
+import json
+import os
+import uuid
+import zipfile
+from typing import List, Optional, Dict, Tuple
+
+from src.models.database import Job, JobGroup, JobOrganization
+from src.models.database import get_db, run_in_transaction
+from src.services.job_queue import JobDeferred, LeaseLost, QueueFullError
+from src.services.db_queue import check_lease, lease_lost
+from src.services.metrics import StageTimer
+from src.services.rate_limit import RateLimitExceeded
+from src.services.event_bus import job_events
+from src.api.routes.documents import (
+    MEMBER_COLUMNS,
+    NotAPDF,
+    UploadTooLarge,
+    job_queue,
+    _complete_job,
+    _extract_organizations,
+    _fail_job,
+    _find_completed_job,
+    _iter_member_rows,
+    _organization_statuses,
+    _queue_full,
+    _register_organizations,
+    _reuse_job_results,
+    _save_upload,
+    _upload_path,
+    fetch_organizations_for_jobs,
+)
+from src.config.config import (
+    MAX_BATCH_FILES,
+    MAX_BATCH_UPLOAD_BYTES,
+    MAX_UPLOAD_BYTES,
+    GROUP_EXTRACT_WORKERS,
+    JOB_MAX_DEFERRALS,
+)
+
+router = APIRouter()
+
+
+class GroupFile(BaseModel):
+    job_id: str
+    pdf_filename: str
+    status: str
+    company_name: Optional[str] = None
+    num_members: Optional[int] = None
+    error_message: Optional[str] = None
+
+
+class GroupOrganization(BaseModel):
+    organization: str
+    status: str  # pending, completed, not_found, failed
+    num_members: Optional[int] = None
+    files: int  # documents of the group that mention this organization
+
+
+class GroupStatusResponse(BaseModel):
+    group_id: str
+    status: str  # pending, processing, completed (at least one document completed), failed
+    num_files: int
+    file_counts: Dict[str, int]  # documents per job status
+    organizations: List[GroupOrganization]
+    files: List[GroupFile]
+
+
+GROUP_EXPORT_COLUMNS = ['job_id', 'pdf_filename', *MEMBER_COLUMNS]
+
+
+@router.post("/upload")
+async def upload_batch(files: List[UploadFile] = File(...)):
+    """Upload many PDFs, or zip archives of PDFs, as one job group.
+
+    Every document becomes its own job, but the group is processed as one
+    unit: documents are extracted in parallel and each organization found
+    in any of them is fetched once.
+    """
+    group_id = str(uuid.uuid4())
+    saved, rejected = await asyncio.to_thread(_save_batch, files)
+    if not saved:
+        return {"error": "No PDF documents in the upload.", "rejected": rejected}
+
+    try:
+        job_ids, pending = await asyncio.to_thread(_create_group, group_id, saved)
+        if pending:
+            job_queue.submit_group(group_id)
+    except QueueFullError as e:
+        await asyncio.to_thread(_discard_group, group_id, saved)
+        raise _queue_full(e)
+    except Exception as e:
+        await asyncio.to_thread(_discard_group, group_id, saved)
+        return {"error": f"Failed to save files: {str(e)}", "rejected": rejected}
+
+    return {"group_id": group_id, "job_ids": job_ids, "rejected": rejected}
+
+
+def _is_zip(file: UploadFile) -> bool:
+    return file.content_type in ("application/zip", "application/x-zip-compressed") or \
+        (file.filename or "").lower().endswith(".zip")
+
+
+def _save_batch(files: List[UploadFile]) -> Tuple[List[Tuple[str, str, str, str]], List[Dict[str, str]]]:
+    """Store every PDF of the batch, unpacking zip archives.
+
+    Returns (job_id, original filename, path, content hash) per stored
+    document and the names of rejected entries with the reason. The bytes
+    written for the whole batch, after unpacking, are capped at
+    MAX_BATCH_UPLOAD_BYTES, so a small archive cannot expand without limit.
+    """
+    saved = []
+    rejected = []
+    stored_bytes = 0
+    batch_too_large = f"Batch expands to more than {MAX_BATCH_UPLOAD_BYTES} bytes"
+
+    def _admit(filename: Optional[str], declared_size: int = 0) -> Optional[int]:
+        """Bytes the next document may take, or None (and the reason recorded) if it is rejected unread"""
+        error = None
+        budget = MAX_BATCH_UPLOAD_BYTES - stored_bytes
+        if len(saved) >= MAX_BATCH_FILES:
+            error = f"More than {MAX_BATCH_FILES} documents in the batch"
+        elif declared_size > MAX_UPLOAD_BYTES:
+            error = "File is too large"
+        elif declared_size > budget or budget <= 0:
+            error = batch_too_large
+        if error is not None:
+            rejected.append({"filename": filename or "", "error": error})
+            return None
+        return budget
+
+    def _store(filename: Optional[str], source, budget: int):
+        nonlocal stored_bytes
+        job_id = str(uuid.uuid4())
+        original_filename, file_path = _upload_path(filename, job_id)
+        try:
+            content_hash = _save_upload(source, file_path, max_bytes=min(MAX_UPLOAD_BYTES, budget))
+        except UploadTooLarge:
+            # Archive sizes are only declared; the cap that was actually hit decides the reason
+            error = "File is too large" if budget >= MAX_UPLOAD_BYTES else batch_too_large
+            rejected.append({"filename": original_filename, "error": error})
+            return
+        except NotAPDF:
+            rejected.append({"filename": original_filename, "error": "Not a PDF document"})
+            return
+        stored_bytes += os.path.getsize(file_path)
+        saved.append((job_id, original_filename, file_path, content_hash))
+
+    for file in files:
+        if _is_zip(file):
+            try:
+                with zipfile.ZipFile(file.file) as archive:
+                    for member in archive.infolist():
+                        name = os.path.basename(member.filename)
+                        if member.is_dir() or not name.lower().endswith(".pdf") or member.filename.startswith("__MACOSX/"):
+                            continue
+                        budget = _admit(name, member.file_size)
+                        if budget is None:
+                            continue
+                        with archive.open(member) as source:
+                            _store(name, source, budget)
+            except zipfile.BadZipFile:
+                rejected.append({"filename": file.filename or "", "error": "Not a valid zip archive"})
+        elif file.content_type == 'application/pdf':
+            budget = _admit(file.filename)
+            if budget is not None:
+                _store(file.filename, file.file, budget)
+        else:
+            rejected.append({"filename": file.filename or "", "error": "Invalid file type"})
+    return saved, rejected
+
+
+def _create_group(group_id: str, saved: List[Tuple[str, str, str, str]]) -> Tuple[List[str], int]:
+    """Create the group and its jobs; documents identical to an earlier one are answered from its results.
+
+    Returns the job ids and how many jobs still need processing.
+    """
+    def _create(db: Session) -> List[str]:
+        group = JobGroup(group_id=group_id, num_files=len(saved), created_at=datetime.datetime.now())
+        db.add(group)
+        db.flush()
+        reused = []
+        pending = 0
+        for job_id, pdf_filename, file_path, content_hash in saved:
+            previous_job = _find_completed_job(db, content_hash)
+            if previous_job:
+                _reuse_job_results(db, job_id, pdf_filename, previous_job, group_id=group_id)
+                reused.append(file_path)
+                continue
+            db.add(Job(
+                job_id=job_id,
+                pdf_filename=pdf_filename,
+                pdf_path=file_path,
+                content_hash=content_hash,
+                status="pending",
+                created_at=datetime.datetime.now(),
+                group_id=group_id
+            ))
+            pending += 1
+        if pending:
+            job_queue.ensure_capacity()
+        else:
+            group.queue_status = "done"  # type: ignore
+        return reused
+
+    reused = run_in_transaction(_create)
+    for file_path in reused:
+        os.remove(file_path)
+    return [job_id for job_id, _, _, _ in saved], len(saved) - len(reused)
+
+
+def _discard_group(group_id: str, saved: List[Tuple[str, str, str, str]]):
+    def _delete(db: Session):
+        db.query(Job).filter(Job.group_id == group_id).delete()
+        db.query(JobGroup).filter(JobGroup.group_id == group_id).delete()
+    run_in_transaction(_delete)
+    for _, _, file_path, _ in saved:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def _group_jobs(group_id: str) -> List[Tuple[str, str]]:
+    """Claim the group's unfinished jobs for processing, returning (job_id, pdf_path) pairs"""
+    def _claim(db: Session) -> List[Tuple[str, str]]:
+        jobs = (
+            db.query(Job)
+            .filter(Job.group_id == group_id, Job.status.in_(["pending", "processing"]))
+            .order_by(Job.created_at)
+            .all()
+        )
+        for job in jobs:
+            job.status = "processing"  # type: ignore
+        return [(str(job.job_id), str(job.pdf_path)) for job in jobs]
+    return run_in_transaction(_claim)
+
+
+def process_group(group_id: str, _pdf_path: str, queue_wait: float = 0.0):
+    """Queue handler for a job group.
+
+    Documents are extracted in parallel, the union of their organizations
+    is fetched once, and each org's results are committed to every job
+    that mentions it. If the server stops midway, the in-memory queue
+    recovers the group's unfinished jobs one by one like single uploads;
+    the database queue hands the whole group to another worker once its
+    lease runs out.
+    """
+    timer = StageTimer()
+    timer.record('queue_wait', queue_wait)
+    status = "failed"
+    jobs = []
+    try:
+        jobs = _group_jobs(group_id)
+        for job_id, _ in jobs:
+            job_events.publish(job_id, "processing", status="processing")
+
+        def _prepare(job: Tuple[str, str]) -> Tuple[str, Dict[str, str]]:
+            job_id, pdf_path = job
+            # Jobs resumed after a deferral already know their organizations
+            organizations = _organization_statuses(job_id)
+            if organizations:
+                return job_id, organizations
+            try:
+                # Every document goes to the process pool, so the group is parsed on all cores
+                github_usernames = _extract_organizations(job_id, pdf_path, timer, min_parallel_pages=1)
+            except Exception as e:
+                _fail_job(job_id, str(e))
+                return job_id, {}
+            _register_organizations(job_id, github_usernames)
+            return job_id, {org_name: "pending" for org_name in github_usernames}
+
+        with ThreadPoolExecutor(max_workers=GROUP_EXTRACT_WORKERS) as pool:
+            prepared = dict(pool.map(_prepare, jobs))
+
+        check_lease()
+        jobs_by_org: Dict[str, List[str]] = {}
+        for job_id, organizations in prepared.items():
+            if organizations:
+                job_events.publish(job_id, "organizations", organizations=list(organizations))
+            for org_name, org_status in organizations.items():
+                if org_status == "pending":
+                    jobs_by_org.setdefault(org_name, []).append(job_id)
+
+        if jobs_by_org:
+            print(f"Group {group_id}: fetching {len(jobs_by_org)} distinct organizations for {len(prepared)} documents")
+            with timer.stage('github_fetch'):
+                asyncio.run(fetch_organizations_for_jobs(group_id, jobs_by_org, timer))
+
+        check_lease()
+        completed = [_complete_job(job_id) for job_id, organizations in prepared.items() if organizations]
+        status = "completed" if any(completed) else "failed"
+
+    except LeaseLost:
+        raise
+
+    except RateLimitExceeded as e:
+        # Finished organizations stay committed; the rest of the group waits for the rate limit to reset
+        check_lease()
+
+        def _defer(db: Session) -> bool:
+            group = db.query(JobGroup).filter(JobGroup.group_id == group_id).first()
+            if not group:
+                return False
+            unfinished = db.query(Job).filter(Job.group_id == group_id, Job.status == "processing")
+            if (group.deferrals or 0) >= JOB_MAX_DEFERRALS:  # type: ignore
+                unfinished.update({
+                    'status': "failed",
+                    'error_message': str(e),
+                    'completed_at': datetime.datetime.now()
+                }, synchronize_session=False)
+                return False
+            unfinished.update({'status': "pending"}, synchronize_session=False)
+            group.deferrals = (group.deferrals or 0) + 1  # type: ignore
+            return True
+
+        if run_in_transaction(_defer):
+            status = "deferred"
+            for job_id, _ in jobs:
+                job_events.publish(job_id, "deferred", status="pending", retry_after=e.retry_after)
+            raise JobDeferred(e.retry_after)
+        for job_id, _ in jobs:
+            job_events.publish(job_id, "failed", status="failed", error_message=str(e))
+
+    except Exception as e:
+        check_lease()
+        for job_id, _ in jobs:
+            _fail_job(job_id, str(e))
+
+    finally:
+        if not lease_lost():
+            _save_group_timings(group_id, [job_id for job_id, _ in jobs], timer, status)
+
+
+job_queue.register_group_handler(process_group)
+
+
+def _save_group_timings(group_id: str, job_ids: List[str], timer: StageTimer, status: str):
+    """Every job of the group gets the group's timings, since its stages ran for all of them at once"""
+    try:
+        timings = json.dumps(timer.finish(status))
+        run_in_transaction(
+            lambda db: db.query(Job).filter(Job.job_id.in_(job_ids)).update({'stage_timings': timings}, synchronize_session=False)
+        )
+    except Exception as e:
+        print(f"Failed to store stage timings for group {group_id}: {e}")
+
+
+def _group_status(job_statuses: List[str]) -> str:
+    if any(status in ("pending", "processing") for status in job_statuses):
+        return "pending" if all(status == "pending" for status in job_statuses) else "processing"
+    return "completed" if "completed" in job_statuses else "failed"
+
+
+@router.get("/{group_id}", response_model=GroupStatusResponse)
+async def group_status(group_id: str = Path(...), db: Session = Depends(get_db)):
+    """Aggregate status of a job group, with per-document and per-organization results"""
+    group = db.query(JobGroup).filter(JobGroup.group_id == group_id).first()
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    jobs = db.query(Job).filter(Job.group_id == group_id).order_by(Job.created_at, Job.pdf_filename).all()
+    files = [
+        GroupFile(
+            job_id=str(job.job_id),
+            pdf_filename=str(job.pdf_filename),
+            status=str(job.status),
+            company_name=job.company_name,  # type: ignore
+            num_members=job.num_members,  # type: ignore
+            error_message=job.error_message  # type: ignore
+        )
+        for job in jobs
+    ]
+    file_counts: Dict[str, int] = {}
+    for file in files:
+        file_counts[file.status] = file_counts.get(file.status, 0) + 1
+
+    rows = (
+        db.query(
+            JobOrganization.organization,
+            JobOrganization.status,
+            func.max(JobOrganization.num_members),
+            func.count(JobOrganization.job_id)
+        )
+        .join(Job, Job.job_id == JobOrganization.job_id)
+        .filter(Job.group_id == group_id)
+        .group_by(JobOrganization.organization, JobOrganization.status)
+        .order_by(JobOrganization.organization)
+        .all()
+    )
+    organizations = [
+        GroupOrganization(organization=organization, status=org_status, num_members=num_members, files=count)
+        for organization, org_status, num_members, count in rows
+    ]
+
+    return GroupStatusResponse(
+        group_id=group_id,
+        status=_group_status([file.status for file in files]),
+        num_files=len(files),
+        file_counts=file_counts,
+        organizations=organizations,
+        files=files
+    )
+
+
+@router.get("/{group_id}/export")
+async def export_group(
+    group_id: str = Path(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    organization: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stream the members found for every document of a group, each row tagged with its document"""
+    jobs = db.query(Job.job_id, Job.pdf_filename).filter(Job.group_id == group_id).order_by(Job.created_at, Job.pdf_filename).all()
+    if not jobs and not db.query(JobGroup.group_id).filter(JobGroup.group_id == group_id).first():
+        raise HTTPException(status_code=404, detail="Group not found")
+    documents = [(str(job_id), str(pdf_filename)) for job_id, pdf_filename in jobs]
+
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(documents, organization),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{group_id}.csv"'}
+        )
+    return StreamingResponse(_export_ndjson(documents, organization), media_type="application/x-ndjson")
+
+
+def _export_ndjson(documents: List[Tuple[str, str]], organization: Optional[str]):
+    for job_id, pdf_filename in documents:
+        for rows in _iter_member_rows(job_id, organization):
+            yield "".join(
+                json.dumps({'job_id': job_id, 'pdf_filename': pdf_filename, **row._mapping}) + "\n"
+                for row in rows
+            )
+
+
+def _export_csv(documents: List[Tuple[str, str]], organization: Optional[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(GROUP_EXPORT_COLUMNS)
+    for job_id, pdf_filename in documents:
+        for rows in _iter_member_rows(job_id, organization):
+            writer.writerows((job_id, pdf_filename, *row) for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
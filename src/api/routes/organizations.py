@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import datetime
+import json
+from typing import List, Optional, Dict, Any
+
+from src.models.database import Organization, OrgMembership, get_db
+from src.api.routes.documents import MemberResponse
+from src.config.config import MEMBERS_PAGE_MAX, ORG_INDEX_FRESH_SECONDS
+
+router = APIRouter()
+
+
+class OrganizationResponse(BaseModel):
+    organization: str
+    status: str  # found, not_found
+    name: Optional[str] = None
+    num_members: int
+    fetched_at: datetime.datetime
+    stale: bool  # older than ORG_INDEX_FRESH_SECONDS; refreshed the next time a job needs it
+    info: Optional[Dict[str, Any]] = None
+
+
+class OrganizationMembersPage(BaseModel):
+    organization: str
+    members: List[MemberResponse]
+    next_after_id: Optional[int] = None
+
+
+class MemberOrganizations(BaseModel):
+    login: str
+    organizations: List[OrganizationResponse]
+
+
+def _organization_response(org: Organization) -> OrganizationResponse:
+    age = (datetime.datetime.now() - org.fetched_at).total_seconds()  # type: ignore
+    return OrganizationResponse(
+        organization=str(org.login),
+        status=str(org.status),
+        name=org.name,  # type: ignore
+        num_members=org.num_members or 0,  # type: ignore
+        fetched_at=org.fetched_at,  # type: ignore
+        stale=age > ORG_INDEX_FRESH_SECONDS,
+        info=json.loads(org.info) if org.info else None  # type: ignore
+    )
+
+
+def _get_organization(db: Session, org_name: str) -> Organization:
+    org = db.query(Organization).filter(Organization.login == org_name).first()
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not in the index")
+    return org
+
+
+@router.get("", response_model=MemberOrganizations)
+async def organizations_of_member(member: str = Query(..., min_length=1), db: Session = Depends(get_db)):
+    """Organizations in the index that `member` is a public member of (case-insensitive login)"""
+    orgs = (
+        db.query(Organization)
+        .join(OrgMembership, OrgMembership.organization_id == Organization.id)
+        .filter(func.lower(OrgMembership.login) == member.lower())
+        .order_by(Organization.login)
+        .all()
+    )
+    return MemberOrganizations(login=member, organizations=[_organization_response(org) for org in orgs])
+
+
+@router.get("/{org_name}", response_model=OrganizationResponse)
+async def get_organization(org_name: str = Path(...), db: Session = Depends(get_db)):
+    """The latest stored snapshot of an organization, without calling GitHub"""
+    return _organization_response(_get_organization(db, org_name))
+
+
+@router.get("/{org_name}/members", response_model=OrganizationMembersPage)
+async def list_organization_members(
+    org_name: str = Path(...),
+    limit: int = Query(100, ge=1, le=MEMBERS_PAGE_MAX),
+    after_id: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """One page of an organization's stored members, ordered by id. Pass `next_after_id` back as `after_id`."""
+    org = _get_organization(db, org_name)
+    rows = (
+        db.query(OrgMembership)
+        .filter(OrgMembership.organization_id == org.id, OrgMembership.id > after_id)
+        .order_by(OrgMembership.id)
+        .limit(limit)
+        .all()
+    )
+    members = [
+        MemberResponse(
+            id=row.id,  # type: ignore
+            login=str(row.login),
+            avatar_url=row.avatar_url,  # type: ignore
+            html_url=row.html_url,  # type: ignore
+            member_type=row.member_type,  # type: ignore
+            organization=org_name
+        )
+        for row in rows
+    ]
+    return OrganizationMembersPage(
+        organization=org_name,
+        members=members,
+        next_after_id=members[-1].id if len(members) == limit else None
+    )
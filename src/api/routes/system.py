@@ -0,0 +1,49 @@
+from fastapi import APIRouter
+
+from src.api.routes.documents import job_queue
+from src.services.event_bus import job_events
+from src.services.handle_extractor import extraction_stats
+from src.services.http_cache import get_github_cache
+from src.services.llm_cache import get_llm_cache
+from src.services.org_cache import org_data_cache
+from src.services.org_index import org_refresher
+from src.services.rate_limit import rate_limiter
+
+router = APIRouter()
+
+
+@router.get("/queue")
+async def queue_metrics():
+    """Queue depth, worker utilisation and wait/run times of background jobs"""
+    return job_queue.metrics()
+
+
+@router.get("/github")
+async def github_rate_limits():
+    """Remaining GitHub API budget per token as last reported by GitHub"""
+    return rate_limiter.stats()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss counters and sizes of the GitHub and LLM caches, and background refreshes of the organization index"""
+    github_cache = get_github_cache()
+    llm_cache = get_llm_cache()
+    return {
+        'github_responses': github_cache.stats() if github_cache else None,
+        'organizations': org_data_cache.stats(),
+        'organization_refresh': org_refresher.stats(),
+        'llm_responses': llm_cache.stats() if llm_cache else None,
+    }
+
+
+@router.get("/extraction")
+async def extraction_metrics():
+    """How many jobs were resolved from explicit GitHub links without calling the LLM"""
+    return extraction_stats.stats()
+
+
+@router.get("/events")
+async def event_stats():
+    """Job events published and clients currently subscribed to them"""
+    return job_events.stats()
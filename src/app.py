@@ -1,19 +1,78 @@
+"""Entry point for running GitDigger.
+
+Without options this is the single-process setup: one API process whose
+threads also run the jobs. With `--workers` or `--job-processes` it runs
+several API processes plus a pool of job worker processes (src/worker.py),
+all coordinating through the database-backed job queue:
+
+    uv run python -m src.app --workers 4 --job-processes 4
+"""
+import argparse
 import os
+import subprocess
 import sys
 import uvicorn
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.api.main import app
-from src.models.database import create_tables
-from src.config.config import UPLOAD_DIR
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 def init_app():
+    from src.models.database import create_tables
     create_tables()
     print("Database tables initialized")
-    
-    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the GitDigger API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="API processes")
+    parser.add_argument("--job-processes", type=int, default=0, help="job worker processes started alongside the API")
+    parser.add_argument("--job-threads", type=int, default=None, help="job threads per worker process (default: WORKER_COUNT)")
+    parser.add_argument("--external-workers", action="store_true",
+                        help="jobs are run by src.worker processes started separately, e.g. on other hosts")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development, single process only)")
+    args = parser.parse_args()
+
+    multi_process = args.workers > 1 or args.job_processes > 0
+    if multi_process:
+        if args.reload:
+            parser.error("--reload runs a single process; drop --workers and --job-processes")
+        # Set before the config is imported here or in any child process
+        os.environ.setdefault("JOB_QUEUE_BACKEND", "database")
+        if os.environ["JOB_QUEUE_BACKEND"] != "database":
+            parser.error("several processes need JOB_QUEUE_BACKEND=database to share jobs")
+        # Imported only now, so the backend chosen above is what the config sees (.env included)
+        from src.config.config import API_WORKER_THREADS
+        if args.job_processes <= 0 and API_WORKER_THREADS <= 0 and not args.external_workers:
+            parser.error(
+                "no process would run jobs: pass --job-processes, set API_WORKER_THREADS, "
+                "or pass --external-workers if src.worker runs elsewhere"
+            )
+
+    init_app()
+
+    pool = None
+    if args.job_processes > 0:
+        command = [sys.executable, "-m", "src.worker", "--processes", str(args.job_processes)]
+        if args.job_threads:
+            command += ["--threads", str(args.job_threads)]
+        pool = subprocess.Popen(command, cwd=ROOT)
+    try:
+        uvicorn.run(
+            "src.api.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            reload=args.reload
+        )
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.wait()
+
 
 if __name__ == "__main__":
-    app = init_app()
-    uvicorn.run("src.app:app", host="0.0.0.0", port=8000, reload=True)
+    main()
@@ -1,19 +1,110 @@
 import os
+from dotenv import load_dotenv
 
 # Base directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# .env fills in whatever the environment does not set, before any setting below is read
+load_dotenv(os.path.join(BASE_DIR, ".env"))
+
 # Database
 DB_PATH = os.path.join(BASE_DIR, "gitdigger.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))  # how long SQLite waits on a lock
+DB_BUSY_RETRIES = int(os.getenv("DB_BUSY_RETRIES", "5"))  # retries of a write that still hit a lock
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 
 # Upload directory
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploaded_files")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(BASE_DIR, "uploaded_files"))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes read per chunk while saving and hashing an upload
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))  # larger uploads get a 413
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "500"))  # documents accepted in one batch upload
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))  # whole batch request
 
 # GitHub API
-GITHUB_API_URL = "https://api.github.com"
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")  # overridable for GitHub Enterprise or a local stand-in
 GITHUB_ACCESS_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN", "")
+# Optional comma-separated pool of extra tokens, used round-robin alongside GITHUB_ACCESS_TOKEN
+GITHUB_ACCESS_TOKENS = list(dict.fromkeys(
+    token.strip()
+    for token in [GITHUB_ACCESS_TOKEN, *os.getenv("GITHUB_ACCESS_TOKENS", "").split(",")]
+    if token.strip()
+))
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "10"))  # in-flight requests per job
+GITHUB_REQUEST_TIMEOUT = float(os.getenv("GITHUB_REQUEST_TIMEOUT", "30"))  # seconds
+
+# Conditional-request (ETag) cache for GitHub responses
+GITHUB_CACHE_ENABLED = os.getenv("GITHUB_CACHE_ENABLED", "true").lower() == "true"
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", os.path.join(BASE_DIR, "github_cache.db"))
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# In-memory cache of whole organization lookups, shared across jobs
+ORG_CACHE_TTL = int(os.getenv("ORG_CACHE_TTL", "3600"))  # seconds a fetched org stays fresh
+ORG_CACHE_MAX_ENTRIES = int(os.getenv("ORG_CACHE_MAX_ENTRIES", "200"))
+
+# Organization index: the latest snapshot of every fetched org and its members, in the database.
+# Members are always stored there; ORG_INDEX_ENABLED decides whether jobs are answered from it.
+ORG_INDEX_ENABLED = os.getenv("ORG_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+ORG_INDEX_FRESH_SECONDS = int(os.getenv("ORG_INDEX_FRESH_SECONDS", str(24 * 3600)))  # used as is
+ORG_INDEX_MAX_AGE_SECONDS = int(os.getenv("ORG_INDEX_MAX_AGE_SECONDS", str(30 * 24 * 3600)))  # used, refreshed in the background
+ORG_REFRESH_BATCH = int(os.getenv("ORG_REFRESH_BATCH", "10"))  # stale orgs refreshed together
+
+# PDF parsing
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 2)))  # processes for full-document extraction
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "20"))  # smaller documents are parsed in-process
+GROUP_EXTRACT_WORKERS = int(os.getenv("GROUP_EXTRACT_WORKERS", str(os.cpu_count() or 2)))  # documents of a batch extracted at once
+PDF_PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", "300"))  # seconds one document may take to parse, 0 for no limit
+PDF_PARSE_TIMEOUT_PER_MB = float(os.getenv("PDF_PARSE_TIMEOUT_PER_MB", "5"))  # added to PDF_PARSE_TIMEOUT per MB of file
+PDF_PARSE_MAX_RSS_MB = int(os.getenv("PDF_PARSE_MAX_RSS_MB", "0"))  # parsing stops if the parsing process grows past this, 0 for no limit
+
+# Skip the LLM when the document links to GitHub organizations explicitly
+HANDLE_FAST_PATH_ENABLED = os.getenv("HANDLE_FAST_PATH_ENABLED", "true").lower() == "true"
+
+# LLM
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+LLM_MAX_INPUT_CHARS = 10000  # characters of document text sent to the model
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # concurrent async model calls per job
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))  # seconds per model call
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "2500"))  # document tokens per extraction prompt
+LLM_JOB_TOKEN_BUDGET = int(os.getenv("LLM_JOB_TOKEN_BUDGET", "50000"))  # prompt tokens one job may spend on extraction
+LLM_LEADING_PAGES = int(os.getenv("LLM_LEADING_PAGES", "3"))  # opening pages read before the budget goes to text-dense pages
+METADATA_BATCH_SIZE = int(os.getenv("METADATA_BATCH_SIZE", "10"))  # orgs asked about per metadata prompt
+
+# Persistent cache of LLM responses keyed by model, prompt version and normalized input
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "llm_cache.db"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))  # hot entries kept in memory
+
+# Member result pages
+MEMBERS_PAGE_MAX = 1000  # largest `limit` accepted by the members endpoint
+EXPORT_CHUNK_SIZE = 1000  # rows read from the database per export chunk
+
+# Job status push (SSE / long-poll)
+# Heartbeat interval on idle event streams, which also re-read the job row then (how jobs run by other processes are seen)
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+EVENT_HISTORY_TTL = 300  # seconds a finished job's events stay replayable
+EVENT_HISTORY_MAX = 200  # events kept per job
+LONG_POLL_MAX_TIMEOUT = 60  # longest wait accepted by the long-poll endpoint
+
+# Artificial per-job delay for exercising the queue in tests; never set in production
+SIMULATION_DELAY = float(os.getenv("SIMULATION_DELAY", "0"))  # seconds
 
-# Simulate long-running process with delays
-SIMULATION_DELAY = 30  # seconds
+# Background job processing
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "4"))
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))
+# memory: jobs run on threads of the API process; database: jobs are claimed from the jobs table
+# by worker processes (src/worker.py), so any number of API and worker processes can run together
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+API_WORKER_THREADS = int(os.getenv("API_WORKER_THREADS", "0"))  # job threads inside each API process with the database backend
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))  # a claimed job whose lease is not renewed in time is taken over
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # seconds an idle worker waits before looking for work again
+# One connection per worker plus headroom for API requests
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(WORKER_COUNT + 5)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+JOB_MAX_DEFERRALS = int(os.getenv("JOB_MAX_DEFERRALS", "5"))  # rate-limit requeues before a job fails
@@ -1,61 +1,341 @@
-import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple, TypeVar
+from sqlalchemy import (
+    create_engine, event, insert, inspect, literal, text, Column, Integer, String, DateTime, ForeignKey, Index, Text, UniqueConstraint
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, Session
+from sqlalchemy.schema import CreateIndex
+from src.config.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_BUSY_TIMEOUT_MS,
+    DB_BUSY_RETRIES,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _create_engine(url: str) -> Engine:
+    if not url.startswith("sqlite"):
+        # Server databases handle concurrency themselves; just size the pool for the workers
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT_MS / 1000},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets status readers run while a worker is committing a large batch
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return sqlite_engine
 
-# Setup database
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-DB_PATH = os.path.join(BASE_DIR, "gitdigger.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 # Create engine and base
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = _create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class JobGroup(Base):
+    """A batch of documents uploaded together; each document is still its own Job"""
+    __tablename__ = 'job_groups'
+    
+    group_id = Column(String, primary_key=True)
+    created_at = Column(DateTime, default=func.current_timestamp())
+    num_files = Column(Integer, default=0)
+    deferrals = Column(Integer, default=0)  # Times the group was requeued because GitHub's rate limit ran out
+    # Claim state for the database-backed queue (see DatabaseJobQueue)
+    queue_status = Column(String, nullable=False, default='pending')  # pending, processing, done
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    available_at = Column(DateTime)  # Not claimable before this, e.g. after a rate-limit deferral
+    
+    jobs = relationship("Job", back_populates="group")
+    
+    def __repr__(self):
+        return f"<JobGroup(group_id='{self.group_id}', num_files={self.num_files})>"
+
+
 class Job(Base):
     """Job model to track document processing"""
     __tablename__ = 'jobs'
+    __table_args__ = (
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
     
     job_id = Column(String, primary_key=True)
     pdf_filename = Column(String, nullable=False)
+    pdf_path = Column(String)  # Stored upload, needed to resume the job after a restart
+    content_hash = Column(String, index=True)  # SHA-256 of the upload, to reuse results for identical files
     status = Column(String, nullable=False, default='pending')  # pending, processing, completed, failed
     company_name = Column(String)
     created_at = Column(DateTime, default=func.current_timestamp())
     completed_at = Column(DateTime)
     error_message = Column(Text)
+    deferrals = Column(Integer, default=0)  # Times the job was requeued because GitHub's rate limit ran out
+    stage_timings = Column(Text)  # JSON seconds per processing stage of the latest run
+    page_triage = Column(Text)  # JSON PDFService.triage of the upload, plus the text-dense page ranking once parsed
+    group_id = Column(String, ForeignKey('job_groups.group_id'), index=True)  # Set for documents of a batch upload
+    # Claim state for the database-backed queue (see DatabaseJobQueue)
+    lease_owner = Column(String)  # Worker currently processing the job
+    lease_expires_at = Column(DateTime)  # Another worker may take the job over after this
+    heartbeat_at = Column(DateTime)
+    available_at = Column(DateTime)  # Not claimable before this, e.g. after a rate-limit deferral
     
-    members = relationship("GitHubMember", back_populates="job", cascade="all, delete-orphan")
+    organizations = relationship("JobOrganization", back_populates="job", cascade="all, delete-orphan")
+    group = relationship("JobGroup", back_populates="jobs")
     num_members = Column(Integer, default=0)  # New column for number of members
     
     def __repr__(self):
         return f"<Job(job_id='{self.job_id}', status='{self.status}', company_name='{self.company_name}')>"
 
 
-class GitHubMember(Base):
-    """GitHub member model to store organization members"""
-    __tablename__ = 'github_members'
+class Organization(Base):
+    """Latest snapshot of a GitHub organization, shared by every job that mentions it"""
+    __tablename__ = 'organizations'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(String, ForeignKey('jobs.job_id', ondelete='CASCADE'), nullable=False)
+    login = Column(String, nullable=False, unique=True)  # Organization name as extracted from documents
+    status = Column(String, nullable=False)  # found, not_found
+    name = Column(String)
+    info = Column(Text)  # JSON organization summary from GitHub
+    num_members = Column(Integer, default=0)
+    fetched_at = Column(DateTime, nullable=False, index=True)
+    
+    memberships = relationship("OrgMembership", back_populates="organization", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<Organization(id={self.id}, login='{self.login}', status='{self.status}', fetched_at='{self.fetched_at}')>"
+
+
+class OrgMembership(Base):
+    """One public member of an organization, stored once however many jobs reference the org"""
+    __tablename__ = 'org_memberships'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    organization_id = Column(Integer, ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False)
     login = Column(String, nullable=False)
     avatar_url = Column(String)
     html_url = Column(String)
     member_type = Column(String)
-    organization = Column(String, nullable=False)  # New column for organization name
     
-    job = relationship("Job", back_populates="members")
+    organization = relationship("Organization", back_populates="memberships")
+    
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'login', name='uq_org_memberships_organization_id_login'),
+        # Keyset pages of an org's (or a job's) members, in id order
+        Index('ix_org_memberships_organization_id_id', 'organization_id', 'id'),
+        # Reverse lookups: which organizations a login belongs to, case-insensitively like GitHub
+        Index('ix_org_memberships_login_lower', func.lower(login)),
+    )
     
     def __repr__(self):
-        return f"<GitHubMember(id={self.id}, login='{self.login}', organization='{self.organization}', job_id='{self.job_id}')>"
+        return f"<OrgMembership(id={self.id}, login='{self.login}', organization_id={self.organization_id})>"
+
+
+class JobOrganization(Base):
+    """Progress of one organization within a job, committed as soon as that org is done"""
+    __tablename__ = 'job_organizations'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey('jobs.job_id', ondelete='CASCADE'), nullable=False, index=True)
+    organization = Column(String, nullable=False)
+    status = Column(String, nullable=False, default='pending')  # pending, completed, not_found, failed
+    num_members = Column(Integer, default=0)  # Members when the job ran; the list itself follows the org's latest snapshot
+    error_message = Column(Text)
+    completed_at = Column(DateTime)
+    organization_id = Column(Integer, ForeignKey('organizations.id'), index=True)  # Snapshot the job's members are read from
+    
+    job = relationship("Job", back_populates="organizations")
+    snapshot = relationship("Organization")
+    
+    __table_args__ = (
+        UniqueConstraint('job_id', 'organization', name='uq_job_organizations_job_id_organization'),
+    )
+    
+    def __repr__(self):
+        return f"<JobOrganization(job_id='{self.job_id}', organization='{self.organization}', status='{self.status}')>"
+
+
+def bulk_insert_memberships(db, organization_id: int, members: Iterable[Dict], batch_size: int = 1000) -> int:
+    """Insert member dicts (as returned by GitHubService) for one organization in executemany batches.
+
+    Skips the ORM unit of work entirely; the caller commits.
+    """
+    statement = insert(OrgMembership)
+    batch = []
+    inserted = 0
+    for member in members:
+        batch.append({
+            'organization_id': organization_id,
+            'login': member.get('login', ''),
+            'avatar_url': member.get('avatar_url', ''),
+            'html_url': member.get('html_url', ''),
+            'member_type': member.get('type', '')
+        })
+        if len(batch) >= batch_size:
+            db.execute(statement, batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        db.execute(statement, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def is_busy_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def run_in_transaction(work: Callable[[Session], T], retries: int = DB_BUSY_RETRIES) -> T:
+    """Run `work` on a fresh session and commit it.
+
+    If the database reports it is locked/busy beyond busy_timeout, the whole
+    unit of work is retried on a new session with jittered backoff.
+    """
+    for attempt in range(retries + 1):
+        db = SessionLocal()
+        try:
+            result = work(db)
+            db.commit()
+            return result
+        except OperationalError as e:
+            db.rollback()
+            if not is_busy_error(e) or attempt == retries:
+                raise
+            delay = min(2.0, 0.05 * 2 ** attempt) * (0.5 + random.random())
+            logger.warning(f"Database busy, retrying in {delay:.2f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+        finally:
+            db.close()
+    raise RuntimeError("unreachable")
+
+
+def update_job(job_id: str, **values) -> bool:
+    """Set columns on a job in its own retried transaction. Returns False if the job does not exist."""
+    def _update(db: Session) -> bool:
+        return db.query(Job).filter(Job.job_id == job_id).update(values) > 0  # type: ignore
+    return run_in_transaction(_update)
+
+
+def _add_missing_columns(connection: Connection, table_names: Iterable[str]):
+    """ALTER TABLE the given existing tables up to the models: add absent columns and indexes.
+
+    Added columns are nullable unless the model gives a constant default (then
+    it becomes the column's DEFAULT); foreign keys are not enforced on them.
+    """
+    inspector = inspect(connection)
+    for table_name in table_names:
+        table = Base.metadata.tables[table_name]
+        existing = {column['name'] for column in inspector.get_columns(table_name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column.type.compile(connection.dialect)}"
+            if column.default is not None and column.default.is_scalar:
+                default = literal(column.default.arg).compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+                ddl += f" DEFAULT {default}" + ("" if column.nullable else " NOT NULL")
+            connection.execute(text(ddl))
+            logger.info(f"Added column {table_name}.{column.name}")
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _copy_github_members(connection: Connection):
+    """Copy the per-job member lists of the old github_members table into the organization index.
+
+    Each organization's snapshot is the member list of the latest job that
+    fetched it, dated by that job, so the next job mentioning the org
+    refreshes it as usual. Every job gets a completed job_organizations row
+    per organization pointing at that snapshot. github_members is left in place.
+    """
+    rows = connection.execute(text(
+        "SELECT DISTINCT m.organization, m.job_id, COALESCE(j.completed_at, j.created_at) AS finished_at "
+        "FROM github_members m JOIN jobs j ON j.job_id = m.job_id ORDER BY finished_at"
+    )).all()
+    latest: Dict[str, Tuple[str, Any]] = {}
+    for organization, job_id, finished_at in rows:
+        latest[organization] = (job_id, finished_at)  # Ordered by time, so the last one wins
+
+    for organization, (job_id, finished_at) in latest.items():
+        params = {'organization': organization, 'job_id': job_id, 'fetched_at': finished_at}
+        connection.execute(text(
+            "INSERT INTO organizations (login, status, num_members, fetched_at) "
+            "VALUES (:organization, 'found', 0, COALESCE(:fetched_at, CURRENT_TIMESTAMP))"
+        ), params)
+        params['organization_id'] = connection.execute(
+            text("SELECT id FROM organizations WHERE login = :organization"), params
+        ).scalar_one()
+        connection.execute(text(
+            "INSERT INTO org_memberships (organization_id, login, avatar_url, html_url, member_type) "
+            "SELECT :organization_id, login, MAX(avatar_url), MAX(html_url), MAX(member_type) FROM github_members "
+            "WHERE job_id = :job_id AND organization = :organization GROUP BY login ORDER BY MIN(id)"
+        ), params)
+        connection.execute(text(
+            "UPDATE organizations SET num_members = "
+            "(SELECT COUNT(*) FROM org_memberships WHERE organization_id = :organization_id) WHERE id = :organization_id"
+        ), params)
+
+    # Jobs from before job_organizations existed only have their github_members rows
+    connection.execute(text(
+        "INSERT INTO job_organizations (job_id, organization, status, num_members, completed_at) "
+        "SELECT m.job_id, m.organization, 'completed', COUNT(DISTINCT m.login), MAX(j.completed_at) "
+        "FROM github_members m JOIN jobs j ON j.job_id = m.job_id "
+        "WHERE NOT EXISTS (SELECT 1 FROM job_organizations o WHERE o.job_id = m.job_id AND o.organization = m.organization) "
+        "GROUP BY m.job_id, m.organization ORDER BY MIN(m.id)"
+    ))
+    connection.execute(text(
+        "UPDATE job_organizations SET organization_id = "
+        "(SELECT id FROM organizations WHERE organizations.login = job_organizations.organization) "
+        "WHERE organization_id IS NULL AND status = 'completed'"
+    ))
+    logger.info(f"Copied github_members of {len(latest)} organizations into the organization index")
+
+
+def upgrade_schema():
+    """Create missing tables and bring a database written by an earlier version up to the models.
+
+    create_all only creates tables that do not exist yet, so columns added to
+    existing tables are added here, and the first run after the organization
+    index was introduced copies the old github_members rows into it. Safe to
+    run on every start.
+    """
+    with engine.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        Base.metadata.create_all(connection)
+        _add_missing_columns(connection, [name for name in Base.metadata.tables if name in existing])
+        if 'organizations' not in existing and 'github_members' in existing:
+            _copy_github_members(connection)
 
 
 def create_tables():
-    """Create database tables"""
-    Base.metadata.create_all(engine)
-    print(f"Tables created in {DB_PATH}")
+    """Create database tables, upgrading an existing database in place"""
+    upgrade_schema()
+    print(f"Tables created in {engine.url.render_as_string(hide_password=True)}")
 
 
 # Database session dependency
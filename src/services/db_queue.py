@@ -0,0 +1,374 @@
+import datetime
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from src.models.database import Job, JobGroup, run_in_transaction
+from src.services.job_queue import JobDeferred, LeaseLost, QueueFullError, _Timing
+from src.config.config import (
+    API_WORKER_THREADS,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_INTERVAL,
+    JOB_QUEUE_MAX_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, str, float], None]
+
+# The queue and job/group id the current handler runs for; asyncio tasks and to_thread calls inherit it
+_current_claim: ContextVar[Optional[Tuple["DatabaseJobQueue", str]]] = ContextVar("current_claim", default=None)
+
+
+def lease_lost() -> bool:
+    """Whether the job or group this handler runs for was taken over by another worker (False outside a queue worker)"""
+    claim = _current_claim.get()
+    if claim is None:
+        return False
+    queue, item_id = claim
+    with queue._lock:
+        return item_id in queue._lost
+
+
+def check_lease():
+    """Raise LeaseLost if another worker took over the work this handler is doing.
+
+    Handlers call it before writing results, so work whose lease ran out
+    while this worker stalled is not finished twice.
+    """
+    if lease_lost():
+        raise LeaseLost(f"Lease on {_current_claim.get()[1]} was taken over by another worker")  # type: ignore
+
+
+def _claimable(model, status_column, pending: str, now: datetime.datetime):
+    """Rows waiting for a worker, or held by a worker whose lease ran out"""
+    return or_(
+        and_(status_column == pending, or_(model.available_at.is_(None), model.available_at <= now)),
+        and_(status_column == "processing", or_(model.lease_expires_at.is_(None), model.lease_expires_at < now)),
+    )
+
+
+class DatabaseJobQueue:
+    """Job queue whose only shared state is the database.
+
+    Pending jobs and job groups are claimed by compare-and-set on their row,
+    which records the claiming worker and a lease. While a handler runs, a
+    heartbeat thread keeps extending the leases it holds; if the process
+    dies, its leases expire and another worker takes the rows over. Any
+    number of API and worker processes can share one database this way
+    without processing a job twice: a worker that stalled past its lease
+    learns from the heartbeat that it lost the row, and its handler stops
+    at the next `check_lease()`.
+
+    Offers the same interface as JobQueue, so the API code is unaware of
+    which backend is in use. With `num_workers=0` (the default for API
+    processes) it only accepts jobs and leaves running them to src/worker.py.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        num_workers: int = API_WORKER_THREADS,
+        max_size: int = JOB_QUEUE_MAX_SIZE,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        poll_interval: float = JOB_POLL_INTERVAL
+    ):
+        self.handler = handler
+        self.group_handler: Optional[Handler] = None
+        self.num_workers = max(0, num_workers)
+        self.max_size = max(1, max_size)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._workers = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._held_jobs: Set[str] = set()
+        self._held_groups: Set[str] = set()
+        self._lost: Set[str] = set()
+        self._running = 0
+        self._claimed = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._deferred = 0
+        self._lease_lost = 0
+        self._wait = _Timing()
+        self._run = _Timing()
+
+    def register_group_handler(self, handler: Handler):
+        self.group_handler = handler
+
+    def start(self):
+        if self._workers or not self.num_workers:
+            return
+        self._stopping.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._workers.append(heartbeat)
+        logger.info(f"Worker {self.worker_id} started {self.num_workers} job threads")
+
+    def stop(self, timeout: float = 5.0):
+        # Jobs still running lose their lease and are picked up by another worker
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def wait(self):
+        """Block until stop() is called, for worker processes that do nothing else"""
+        while not self._stopping.wait(1.0):
+            pass
+
+    def recover(self):
+        """Nothing to do: unfinished jobs stay claimable and expired leases are taken over"""
+
+    # Submission side, used by the API
+
+    def depth(self) -> int:
+        def _count(db) -> int:
+            now = datetime.datetime.now()
+            jobs = db.query(func.count(Job.job_id)).filter(
+                Job.group_id.is_(None), Job.status == "pending"
+            ).scalar()
+            groups = db.query(func.count(JobGroup.group_id)).filter(
+                _claimable(JobGroup, JobGroup.queue_status, "pending", now), JobGroup.queue_status == "pending"
+            ).scalar()
+            return (jobs or 0) + (groups or 0)
+        return run_in_transaction(_count)
+
+    def is_full(self) -> bool:
+        return self.depth() >= self.max_size
+
+    def ensure_capacity(self):
+        depth = self.depth()
+        if depth >= self.max_size:
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError(depth, self.max_size, self.retry_after(depth))
+
+    def retry_after(self, depth: Optional[int] = None) -> int:
+        with self._lock:
+            avg_run = self._run.total / self._run.count if self._run.count else 30.0
+        depth = self.depth() if depth is None else depth
+        return max(1, math.ceil(avg_run * (depth + 1) / max(1, self.num_workers or 1)))
+
+    def submit(self, job_id: str, pdf_path: str, handler: Optional[Handler] = None):
+        # The pending row is the submission; a worker will claim it
+        pass
+
+    def submit_group(self, group_id: str):
+        pass
+
+    # Worker side
+
+    def _claim_job(self) -> Optional[Tuple[str, str, float]]:
+        def _claim(db) -> Optional[Tuple[str, str, float]]:
+            now = datetime.datetime.now()
+            candidate = (
+                db.query(Job.job_id, Job.pdf_path, Job.created_at, Job.available_at)
+                .filter(Job.group_id.is_(None), _claimable(Job, Job.status, "pending", now))
+                .order_by(Job.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+            # Compare-and-set: only one worker's update can still match the claimable condition
+            claimed = db.query(Job).filter(
+                Job.job_id == candidate.job_id, _claimable(Job, Job.status, "pending", now)
+            ).update({
+                'status': "processing",
+                'lease_owner': self.worker_id,
+                'lease_expires_at': now + datetime.timedelta(seconds=self.lease_seconds),
+                'heartbeat_at': now,
+            }, synchronize_session=False)
+            if not claimed:
+                return None
+            queued_since = max(filter(None, (candidate.created_at, candidate.available_at)), default=now)
+            return str(candidate.job_id), str(candidate.pdf_path), max(0.0, (now - queued_since).total_seconds())
+        return run_in_transaction(_claim)
+
+    def _claim_group(self) -> Optional[Tuple[str, float]]:
+        def _claim(db) -> Optional[Tuple[str, float]]:
+            now = datetime.datetime.now()
+            candidate = (
+                db.query(JobGroup.group_id, JobGroup.created_at, JobGroup.available_at)
+                .filter(_claimable(JobGroup, JobGroup.queue_status, "pending", now))
+                .order_by(JobGroup.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+            claimed = db.query(JobGroup).filter(
+                JobGroup.group_id == candidate.group_id,
+                _claimable(JobGroup, JobGroup.queue_status, "pending", now)
+            ).update({
+                'queue_status': "processing",
+                'lease_owner': self.worker_id,
+                'lease_expires_at': now + datetime.timedelta(seconds=self.lease_seconds),
+            }, synchronize_session=False)
+            if not claimed:
+                return None
+            queued_since = max(filter(None, (candidate.created_at, candidate.available_at)), default=now)
+            return str(candidate.group_id), max(0.0, (now - queued_since).total_seconds())
+        return run_in_transaction(_claim)
+
+    def _release_job(self, job_id: str, deferred_for: Optional[float] = None):
+        values: Dict = {'lease_owner': None, 'lease_expires_at': None}
+        if deferred_for is not None:
+            values['available_at'] = datetime.datetime.now() + datetime.timedelta(seconds=deferred_for)
+        run_in_transaction(
+            lambda db: db.query(Job).filter(Job.job_id == job_id, Job.lease_owner == self.worker_id)
+            .update(values, synchronize_session=False)
+        )
+
+    def _release_group(self, group_id: str, deferred_for: Optional[float] = None):
+        values: Dict = {'lease_owner': None, 'lease_expires_at': None, 'queue_status': "done"}
+        if deferred_for is not None:
+            values['queue_status'] = "pending"
+            values['available_at'] = datetime.datetime.now() + datetime.timedelta(seconds=deferred_for)
+        run_in_transaction(
+            lambda db: db.query(JobGroup).filter(JobGroup.group_id == group_id, JobGroup.lease_owner == self.worker_id)
+            .update(values, synchronize_session=False)
+        )
+
+    def _next(self) -> Optional[Tuple[str, str, str, float]]:
+        """Claim the next unit of work as (kind, id, pdf_path, queue_wait)"""
+        if self.group_handler is not None:
+            group = self._claim_group()
+            if group is not None:
+                return "group", group[0], "", group[1]
+        job = self._claim_job()
+        if job is not None:
+            return "job", job[0], job[1], job[2]
+        return None
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self._next()
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {e}")
+                claimed = None
+            if claimed is None:
+                # Jitter keeps idle workers of many processes from polling in lockstep
+                self._stopping.wait(self.poll_interval * (0.5 + random.random()))
+                continue
+
+            kind, item_id, pdf_path, queue_wait = claimed
+            held = self._held_groups if kind == "group" else self._held_jobs
+            release = self._release_group if kind == "group" else self._release_job
+            handler = self.group_handler if kind == "group" else self.handler
+            started = time.monotonic()
+            with self._lock:
+                held.add(item_id)
+                self._claimed += 1
+                self._running += 1
+                self._wait.observe(queue_wait)
+
+            deferred_for = None
+            claim = _current_claim.set((self, item_id))
+            try:
+                handler(item_id, pdf_path, queue_wait)  # type: ignore
+                with self._lock:
+                    self._completed += 1
+            except LeaseLost:
+                logger.warning(f"{kind.capitalize()} {item_id} was taken over by another worker; stopped handling it")
+            except JobDeferred as e:
+                deferred_for = e.delay
+                with self._lock:
+                    self._deferred += 1
+                logger.info(f"{kind.capitalize()} {item_id} deferred for {int(e.delay)}s")
+            except Exception as e:
+                logger.error(f"{kind.capitalize()} {item_id} raised an unhandled error: {e}")
+                with self._lock:
+                    self._failed += 1
+            finally:
+                _current_claim.reset(claim)
+                with self._lock:
+                    held.discard(item_id)
+                    self._lost.discard(item_id)
+                    self._running -= 1
+                    self._run.observe(time.monotonic() - started)
+                try:
+                    release(item_id, deferred_for)
+                except Exception as e:
+                    logger.error(f"Failed to release {kind} {item_id}: {e}")
+
+    def _heartbeat(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stopping.wait(interval):
+            with self._lock:
+                jobs = list(self._held_jobs)
+                groups = list(self._held_groups)
+            if not jobs and not groups:
+                continue
+
+            def _renew(db) -> Set[str]:
+                now = datetime.datetime.now()
+                expires = now + datetime.timedelta(seconds=self.lease_seconds)
+                held = set()
+                if jobs:
+                    owned = db.query(Job).filter(Job.job_id.in_(jobs), Job.lease_owner == self.worker_id)
+                    owned.update({'lease_expires_at': expires, 'heartbeat_at': now}, synchronize_session=False)
+                    held.update(job_id for job_id, in owned.with_entities(Job.job_id))
+                if groups:
+                    owned = db.query(JobGroup).filter(JobGroup.group_id.in_(groups), JobGroup.lease_owner == self.worker_id)
+                    owned.update({'lease_expires_at': expires}, synchronize_session=False)
+                    held.update(group_id for group_id, in owned.with_entities(JobGroup.group_id))
+                return held
+
+            try:
+                held = run_in_transaction(_renew)
+            except Exception as e:
+                logger.error(f"Failed to renew job leases: {e}")
+                continue
+            with self._lock:
+                # Only happens if we stalled past the lease and another worker took over; rows released
+                # since the snapshot are no longer held and do not count
+                lost = {
+                    item_id for item_id in set(jobs) | set(groups)
+                    if item_id not in held and item_id not in self._lost
+                    and (item_id in self._held_jobs or item_id in self._held_groups)
+                }
+                self._lost |= lost
+                self._lease_lost += len(lost)
+            if lost:
+                logger.warning(f"Worker {self.worker_id} lost {len(lost)} leases; their handlers stop at the next check")
+
+    def metrics(self) -> Dict:
+        depth = self.depth()
+        with self._lock:
+            return {
+                'backend': "database",
+                'worker_id': self.worker_id,
+                'workers': self.num_workers,
+                'capacity': self.max_size,
+                'queue_depth': depth,
+                'running': self._running,
+                'claimed': self._claimed,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'deferred': self._deferred,
+                'leases_lost': self._lease_lost,
+                'wait_time': self._wait.as_dict(),
+                'run_time': self._run.as_dict(),
+            }
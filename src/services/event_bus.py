@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.config.config import EVENT_HISTORY_TTL, EVENT_HISTORY_MAX
+
+TERMINAL_EVENTS = ("completed", "failed")
+
+
+class JobEventBus:
+    """In-process pub/sub of job state changes.
+
+    Worker threads `publish`; request handlers on the event loop `subscribe`.
+    Each job keeps a short history of its events, numbered from 1, so a
+    subscriber that connects (or reconnects with Last-Event-ID) late still
+    sees what it missed. Histories of finished jobs are dropped after
+    `history_ttl` seconds; clients that come later read the jobs table.
+    """
+
+    def __init__(self, history_ttl: float = EVENT_HISTORY_TTL, history_max: int = EVENT_HISTORY_MAX):
+        self.history_ttl = history_ttl
+        self.history_max = history_max
+        self._lock = threading.Lock()
+        self._history: Dict[str, List[Dict]] = {}
+        self._sequence: Dict[str, int] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self.published = 0
+
+    def publish(self, job_id: str, event: str, **data) -> Dict:
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            sequence = self._sequence.get(job_id, 0) + 1
+            self._sequence[job_id] = sequence
+            message = {'job_id': job_id, 'event': event, 'seq': sequence, 'timestamp': now, **data}
+            history = self._history.setdefault(job_id, [])
+            history.append(message)
+            del history[:-self.history_max]
+            if event in TERMINAL_EVENTS:
+                self._finished_at[job_id] = now
+            subscribers = list(self._subscribers.get(job_id, ()))
+            self.published += 1
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                pass  # The subscriber's loop has closed
+        return message
+
+    def _prune(self, now: float):
+        expired = [job_id for job_id, finished in self._finished_at.items() if now - finished > self.history_ttl]
+        for job_id in expired:
+            del self._finished_at[job_id]
+            self._history.pop(job_id, None)
+            self._sequence.pop(job_id, None)
+
+    def history(self, job_id: str, after: int = 0) -> List[Dict]:
+        with self._lock:
+            return [message for message in self._history.get(job_id, ()) if message['seq'] > after]
+
+    async def subscribe(self, job_id: str, after: int = 0, keepalive: Optional[float] = None) -> AsyncIterator[Optional[Dict]]:
+        """Yield the job's events after sequence `after`, ending after a terminal event.
+
+        With `keepalive`, None is yielded whenever that many seconds pass
+        without an event, so the caller can write a heartbeat.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._lock:
+            # Register and snapshot under one lock so nothing falls in between
+            self._subscribers.setdefault(job_id, []).append(subscriber)
+            backlog = [message for message in self._history.get(job_id, ()) if message['seq'] > after]
+
+        try:
+            last_seq = after
+            for message in backlog:
+                last_seq = message['seq']
+                yield message
+                if message['event'] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message['seq'] <= last_seq:
+                    continue
+                last_seq = message['seq']
+                yield message
+                if message['event'] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'published': self.published,
+                'jobs_tracked': len(self._history),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+            }
+
+
+job_events = JobEventBus()
@@ -1,65 +1,171 @@
-import requests
+import asyncio
+import re
+import threading
 import time
-from typing import Dict, List, Optional
-import dotenv
-from src.config.config import GITHUB_API_URL, GITHUB_ACCESS_TOKEN
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+from src.services.http_cache import get_github_cache
+from src.services.org_cache import org_data_cache
+from src.services.rate_limit import RateLimitExceeded, rate_limiter
+from src.config.config import (
+    GITHUB_API_URL,
+    GITHUB_ACCESS_TOKENS,
+    GITHUB_MAX_CONCURRENCY,
+    GITHUB_REQUEST_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+MEMBERS_PER_PAGE = 100
+
+_LAST_PAGE_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def _org_summary(data: Dict) -> Dict:
+    return {
+        'login': data.get('login'),
+        'name': data.get('name'),
+        'public_repos': data.get('public_repos', 0),
+        'public_members': data.get('public_members', 0),
+        'created_at': data.get('created_at'),
+        'location': data.get('location'),
+        'description': data.get('description')
+    }
+
+
+def _member_summary(member: Dict) -> Dict:
+    return {
+        'login': member.get('login'),
+        'avatar_url': member.get('avatar_url'),
+        'html_url': member.get('html_url'),
+        'type': member.get('type')
+    }
+
+
+class GitHubRequestError(Exception):
+    """A request failed for a reason other than the resource not existing (network error, 5xx, bad body)"""
+
+
+def _organization_not_found() -> Dict:
+    return {
+        'success': False,
+        'company_name': None,
+        'github_members': [],
+        'num_members': 0,
+        'error': 'Organization not found',
+        'not_found': True  # GitHub answered 404, as opposed to a failed lookup
+    }
+
+
+def _organization_unavailable(error: str) -> Dict:
+    """A lookup that failed without GitHub saying the org is missing; never stored as a snapshot"""
+    return {**_organization_not_found(), 'error': error, 'not_found': False}
+
+
+def _organization_data(org_info: Dict, members: List[Dict]) -> Dict:
+    return {
+        'success': True,
+        'company_name': org_info['name'] or org_info['login'],
+        'github_members': members,
+        'num_members': len(members),
+        'organization_info': org_info
+    }
+
+
+def parse_last_page(link_header: Optional[str]) -> Optional[int]:
+    """Return the page number of the rel="last" link, or None when there is none"""
+    if not link_header:
+        return None
+    match = _LAST_PAGE_PATTERN.search(link_header)
+    return int(match.group(1)) if match else None
+
+
+def _tokens(access_token: Optional[str]) -> List[str]:
+    tokens = [access_token] if access_token else GITHUB_ACCESS_TOKENS
+    if not tokens:
+        raise ValueError("GitHub access token required")
+    return tokens
 
-dotenv.load_dotenv()
 
 class GitHubService:
-    def __init__(self, access_token: str = None): # type: ignore
-        self.access_token = access_token or GITHUB_ACCESS_TOKEN
-        if not self.access_token:
-            raise ValueError("GitHub access token required")
-        
+    """Blocking GitHub client.
+
+    Requests are charged to the shared `rate_limiter`; when every token is out
+    of budget, RateLimitExceeded is raised rather than sleeping until the reset.
+    Responses are revalidated against the shared ETag cache, and whole
+    organization lookups are shared through `org_data_cache`, unless
+    `use_cache` is False.
+    """
+
+    def __init__(self, access_token: str = None, job_id: str = None, use_cache: bool = True): # type: ignore
+        self.tokens = _tokens(access_token)
+        self.access_token = self.tokens[0]
+        self.job_id = job_id
+        self.use_cache = use_cache
+        self.cache = get_github_cache() if use_cache else None
+
         self.base_url = GITHUB_API_URL
         self.headers = {
-            'Authorization': f'Bearer {self.access_token}',
             'Accept': 'application/vnd.github.v3+json'
         }
-    
+        import requests  # Only this blocking client needs requests; keep it off the import path of the API
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
     def _make_request(self, url: str, params: Dict = None) -> Dict: # type: ignore
-        """Make API request with basic error handling"""
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            
-        
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                reset_time = int(response.headers.get('X-RateLimit-Reset', 0)) - time.time()
-                if reset_time > 0:
-                    time.sleep(reset_time + 1)
-                    return self._make_request(url, params)
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException:
-            return None # type: ignore
-    
+        """Make API request. Returns None for a 404 and raises GitHubRequestError for any other failure."""
+        import requests
+        key, entry, conditional = self.cache.lookup(url, params) if self.cache else (None, None, {})
+
+        # A rate-limited token is retried once on each of the other tokens
+        for _ in range(len(self.tokens)):
+            token = rate_limiter.acquire(self.tokens, self.job_id)
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers={'Authorization': f'Bearer {token}', **conditional},
+                    timeout=GITHUB_REQUEST_TIMEOUT
+                )
+            except requests.exceptions.RequestException as e:
+                raise GitHubRequestError(f"GitHub request failed: {e}") from e
+
+            if rate_limiter.update(token, response.status_code, response.headers):
+                continue
+
+            if response.status_code == 304 and entry is not None:
+                return self.cache.not_modified(key, entry) # type: ignore
+            if response.status_code == 404:
+                return None # type: ignore
+
+            if response.status_code >= 400:
+                raise GitHubRequestError(f"GitHub returned {response.status_code} for {url}")
+            try:
+                data = response.json()
+            except ValueError as e:
+                raise GitHubRequestError(f"GitHub returned an invalid body for {url}") from e
+            if self.cache:
+                self.cache.save(key, response.headers, data) # type: ignore
+            return data
+
+        raise RateLimitExceeded(rate_limiter.retry_after(self.tokens))
+
     def get_organization(self, org_name: str) -> Optional[Dict]:
-        """Get organization details"""
+        """Get organization details, or None if it does not exist"""
         url = f"{self.base_url}/orgs/{org_name}"
         data = self._make_request(url)
-        
+
         if not data:
             return None
-            
-        return {
-            'login': data.get('login'),
-            'name': data.get('name'),
-            'public_repos': data.get('public_repos', 0),
-            'public_members': data.get('public_members', 0),
-            'created_at': data.get('created_at'),
-            'location': data.get('location'),
-            'description': data.get('description')
-        }
-    
+
+        return _org_summary(data)
+
     def get_organization_members(self, org_name: str, max_members: int = 1000) -> List[Dict]:
         url = f"{self.base_url}/orgs/{org_name}/public_members"
         members = []
         page = 1
         fetched = 0
-        per_page = 100
+        per_page = MEMBERS_PER_PAGE
         while True:
             params = {'page': page, 'per_page': per_page}
             data = self._make_request(url, params)
@@ -68,33 +174,250 @@ class GitHubService:
             for member in data:
                 if fetched >= max_members:
                     return members
-                members.append({
-                    'login': member.get('login'),
-                    'avatar_url': member.get('avatar_url'),
-                    'html_url': member.get('html_url'),
-                    'type': member.get('type')
-                })
+                members.append(_member_summary(member))
                 fetched += 1
             if len(data) < per_page or fetched >= max_members:
                 break
             page += 1
         return members
-    
+
     def get_organization_data(self, org_name: str, max_members: int = 1000) -> Dict:
-        org_info = self.get_organization(org_name)
-        if not org_info:
-            return {
-                'success': False,
-                'company_name': None,
-                'github_members': [],
-                'num_members': 0,
-                'error': 'Organization not found'
-            }
-        members = self.get_organization_members(org_name, max_members=max_members)
-        return {
-            'success': True,
-            'company_name': org_info['name'] or org_info['login'],
-            'github_members': members,
-            'num_members': len(members),
-            'organization_info': org_info
-        }
\ No newline at end of file
+        if not self.use_cache:
+            return self._fetch_organization_data(org_name, max_members)
+        return org_data_cache.get_or_load(
+            org_name, max_members, lambda: self._fetch_organization_data(org_name, max_members)
+        )
+
+    def _fetch_organization_data(self, org_name: str, max_members: int) -> Dict:
+        try:
+            org_info = self.get_organization(org_name)
+            if not org_info:
+                return _organization_not_found()
+            members = self.get_organization_members(org_name, max_members=max_members)
+        except GitHubRequestError as e:
+            return _organization_unavailable(str(e))
+        return _organization_data(org_info, members)
+
+
+_github_service: Optional[GitHubService] = None
+_github_service_lock = threading.Lock()
+
+
+def get_github_service() -> GitHubService:
+    """The process-wide blocking client, created on first use so a missing token fails that call, not startup.
+
+    AsyncGitHubService stays per job: its connection pool belongs to the
+    event loop it was opened on.
+    """
+    global _github_service
+    with _github_service_lock:
+        if _github_service is None:
+            _github_service = GitHubService()
+        return _github_service
+
+
+class AsyncGitHubService:
+    """Asyncio counterpart of GitHubService.
+
+    Uses one pooled httpx connection per service and caps in-flight requests
+    with a semaphore. Member pages after the first are fetched in parallel
+    using the page count from the `Link` header, and several organizations
+    can be fetched at once with `get_organizations_data`. Rate limiting and
+    ETag caching are shared with `GitHubService`, and results match it exactly.
+
+    Use as an async context manager so the connection pool is closed:
+
+        async with AsyncGitHubService() as github:
+            results = await github.get_organizations_data(["google", "microsoft"])
+    """
+
+    def __init__(
+        self,
+        access_token: str = None, # type: ignore
+        max_concurrency: int = GITHUB_MAX_CONCURRENCY,
+        job_id: str = None, # type: ignore
+        use_cache: bool = True
+    ):
+        self.tokens = _tokens(access_token)
+        self.access_token = self.tokens[0]
+        self.job_id = job_id
+        self.use_cache = use_cache
+        self.cache = get_github_cache() if use_cache else None
+
+        self.base_url = GITHUB_API_URL
+        self.headers = {
+            'Accept': 'application/vnd.github.v3+json'
+        }
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    async def __aenter__(self) -> "AsyncGitHubService":
+        import httpx
+        rate_limiter.register_job(self.job_id)
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=GITHUB_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            rate_limiter.release_job(self.job_id)
+
+    async def _make_request(self, url: str, params: Dict = None) -> Tuple[Optional[Dict], Mapping[str, str]]: # type: ignore
+        """Make API request, returning the decoded body (None for a 404) and the response headers.
+
+        Raises GitHubRequestError for any other failure.
+        """
+        import httpx
+        if self._client is None:
+            raise RuntimeError("AsyncGitHubService must be used as an async context manager")
+
+        key, entry, conditional = self.cache.lookup(url, params) if self.cache else (None, None, {})
+
+        for _ in range(len(self.tokens)):
+            async with self._semaphore:
+                token = rate_limiter.acquire(self.tokens, self.job_id)
+                try:
+                    response = await self._client.get(
+                        url,
+                        params=params,
+                        headers={'Authorization': f'Bearer {token}', **conditional}
+                    )
+                except httpx.HTTPError as e:
+                    raise GitHubRequestError(f"GitHub request failed: {e}") from e
+
+            if rate_limiter.update(token, response.status_code, response.headers):
+                continue
+
+            if response.status_code == 304 and entry is not None:
+                data = self.cache.not_modified(key, entry) # type: ignore
+                return data, httpx.Headers({'Link': entry['link']} if entry.get('link') else {})
+            if response.status_code == 404:
+                return None, httpx.Headers()
+
+            if response.status_code >= 400:
+                raise GitHubRequestError(f"GitHub returned {response.status_code} for {url}")
+            try:
+                data = response.json()
+            except ValueError as e:
+                raise GitHubRequestError(f"GitHub returned an invalid body for {url}") from e
+            if self.cache:
+                self.cache.save(key, response.headers, data) # type: ignore
+            return data, response.headers
+
+        raise RateLimitExceeded(rate_limiter.retry_after(self.tokens))
+
+    async def get_organization(self, org_name: str) -> Optional[Dict]:
+        """Get organization details, or None if it does not exist"""
+        data, _ = await self._make_request(f"{self.base_url}/orgs/{org_name}")
+        if not data:
+            return None
+        return _org_summary(data)
+
+    async def get_organization_members(self, org_name: str, max_members: int = 1000) -> List[Dict]:
+        if max_members <= 0:
+            return []
+
+        url = f"{self.base_url}/orgs/{org_name}/public_members"
+        per_page = MEMBERS_PER_PAGE
+
+        first_page, headers = await self._make_request(url, {'page': 1, 'per_page': per_page})
+        if not first_page:
+            return []
+
+        pages = [first_page]
+        wanted_pages = -(-max_members // per_page)
+        last_page = parse_last_page(headers.get('link'))
+        if len(first_page) >= per_page and wanted_pages > 1:
+            if last_page is not None:
+                responses = await asyncio.gather(*(
+                    self._make_request(url, {'page': page, 'per_page': per_page})
+                    for page in range(2, min(last_page, wanted_pages) + 1)
+                ))
+                pages.extend(data for data, _ in responses)
+            else:
+                # No Link header to size the walk; fall back to one page at a time
+                page = 2
+                while page <= wanted_pages and len(pages[-1] or []) >= per_page:
+                    data, _ = await self._make_request(url, {'page': page, 'per_page': per_page})
+                    pages.append(data)
+                    page += 1
+
+        # Same stopping rules as the sequential walk: an empty page or a short page ends it
+        members = []
+        for data in pages:
+            if not data:
+                break
+            members.extend(_member_summary(member) for member in data)
+            if len(data) < per_page or len(members) >= max_members:
+                break
+        return members[:max_members]
+
+    async def get_organization_data(self, org_name: str, max_members: int = 1000) -> Dict:
+        if not self.use_cache:
+            return await self._fetch_organization_data(org_name, max_members)
+        return await org_data_cache.aget_or_load(
+            org_name, max_members, lambda: self._fetch_organization_data(org_name, max_members)
+        )
+
+    async def _fetch_organization_data(self, org_name: str, max_members: int) -> Dict:
+        try:
+            org_info = await self.get_organization(org_name)
+            if not org_info:
+                return _organization_not_found()
+            members = await self.get_organization_members(org_name, max_members=max_members)
+        except GitHubRequestError as e:
+            return _organization_unavailable(str(e))
+        return _organization_data(org_info, members)
+
+    async def get_organizations_data(
+        self,
+        org_names: List[str],
+        max_members: int = 1000,
+        timings: Optional[Dict[str, float]] = None,
+        on_result: Optional[Callable[[str, Dict], Awaitable[None]]] = None
+    ) -> Dict[str, Dict]:
+        """Fetch several organizations concurrently, keyed by org name.
+
+        An org whose fetch raises is reported as failed, with the error message.
+        RateLimitExceeded is re-raised so the whole job can be deferred, after
+        the other orgs have finished. If `timings` is given, it receives the
+        seconds each org took; `on_result` is awaited with each org's data as
+        soon as it arrives.
+        """
+        async def fetch(name: str) -> Dict:
+            started = time.perf_counter()
+            try:
+                result = await self.get_organization_data(name, max_members=max_members)
+            except RateLimitExceeded:
+                raise
+            except Exception as e:
+                result = _organization_unavailable(str(e))
+            finally:
+                if timings is not None:
+                    timings[name] = time.perf_counter() - started
+            if on_result is not None:
+                await on_result(name, result)
+            return result
+
+        unique_names = list(dict.fromkeys(org_names))
+        results = await asyncio.gather(*(fetch(name) for name in unique_names), return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, RateLimitExceeded):
+                raise result
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(unique_names, results))  # type: ignore
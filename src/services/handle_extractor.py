@@ -0,0 +1,76 @@
+import re
+import threading
+from typing import Dict, Iterable, List
+
+# github.com/<handle> or github.com/orgs/<handle>; handles are 1-39 alphanumerics or single hyphens.
+# The host must be github.com itself (or www.), not docs.github.com, gist.github.com or notgithub.com.
+_GITHUB_URL = re.compile(
+    r"(?:https?://)?(?<![\w.-])(?:www\.)?github\.com/(?:orgs/)?"
+    r"([a-z0-9](?:[a-z0-9]|-(?=[a-z0-9])){0,38})"
+    r"(?![a-z0-9-])",
+    re.IGNORECASE
+)
+
+# First path segments on github.com that are site pages, not accounts
+_RESERVED_PATHS = {
+    "about", "account", "apps", "articles", "blog", "codespaces", "collections", "community",
+    "contact", "copilot", "customer-stories", "dashboard", "de", "discussions", "docs",
+    "education", "en", "enterprise", "es", "events", "explore", "features", "fr",
+    "git-guides", "home", "issues", "ja", "join", "login", "logout", "marketplace",
+    "new", "notifications", "open-source", "organizations", "orgs", "pricing", "pt",
+    "pulls", "readme", "resources", "search", "security", "sessions", "settings", "site",
+    "solutions", "sponsors", "stars", "team", "topics", "trending", "users", "watching",
+    "why-github", "zh",
+}
+
+
+def find_github_handles(texts: Iterable[str]) -> List[str]:
+    """Lowercase GitHub handles named by explicit github.com URLs, in first-seen order"""
+    handles = {}
+    for text in texts:
+        if not text:
+            continue
+        for match in _GITHUB_URL.finditer(text):
+            handle = match.group(1).lower()
+            if handle not in _RESERVED_PATHS:
+                handles[handle] = None
+    return list(handles)
+
+
+def pages_without_handles(pages: Dict[int, str]) -> Dict[int, str]:
+    """The pages (number -> text) that name no account through a github.com URL"""
+    return {number: text for number, text in pages.items() if not find_github_handles([text])}
+
+
+class ExtractionStats:
+    """Counts how jobs got their organization handles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.llm = 0
+        self.merged = 0
+
+    def record(self, fast_path: bool, merged: bool = False):
+        """`merged`: links covered part of the document and the LLM read the rest"""
+        with self._lock:
+            if fast_path:
+                self.fast_path += 1
+            else:
+                self.llm += 1
+                if merged:
+                    self.merged += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.fast_path + self.llm
+            return {
+                'jobs': total,
+                'resolved_without_llm': self.fast_path,
+                'llm_fallbacks': self.llm,
+                'merged_with_links': self.merged,
+                'fast_path_rate': round(self.fast_path / total, 3) if total else 0.0,
+            }
+
+
+extraction_stats = ExtractionStats()
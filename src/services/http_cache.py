@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from src.utils.sqlite_cache import SQLiteCache
+from src.config.config import (
+    GITHUB_CACHE_ENABLED,
+    GITHUB_CACHE_PATH,
+    GITHUB_CACHE_TTL,
+    GITHUB_CACHE_MAX_BYTES,
+)
+
+
+class ConditionalRequestCache:
+    """Stores GitHub responses with their ETag/Last-Modified validators.
+
+    Requests for a cached URL are sent with If-None-Match/If-Modified-Since;
+    a 304 is answered from the stored body. GitHub does not charge 304s
+    against the rate limit, so repeat lookups of the same org cost no quota.
+    """
+
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None) -> str:
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def lookup(self, url: str, params: Optional[Dict] = None) -> Tuple[str, Optional[Dict], Dict[str, str]]:
+        """Return the cache key, the stored entry (if any) and the conditional headers to send"""
+        key = self.key(url, params)
+        entry = self.store.get(key)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return key, entry, headers
+
+    def not_modified(self, key: str, entry: Dict) -> Any:
+        """Record a 304 and return the stored body"""
+        self.store.touch(key)
+        with self._lock:
+            self.hits += 1
+        return entry['body']
+
+    def save(self, key: str, headers: Mapping[str, str], body: Any):
+        with self._lock:
+            self.misses += 1
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        self.store.set(key, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'link': headers.get('Link'),
+            'body': body,
+        })
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        store = self.store.stats()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 3) if requests else 0.0,
+            'entries': store['entries'],
+            'size_bytes': store['size_bytes'],
+            'evictions': store['evictions'],
+        }
+
+
+_github_cache: Optional[ConditionalRequestCache] = None
+_github_cache_lock = threading.Lock()
+
+
+def get_github_cache() -> Optional[ConditionalRequestCache]:
+    """Process-wide GitHub response cache, or None when GITHUB_CACHE_ENABLED is off"""
+    global _github_cache
+    if not GITHUB_CACHE_ENABLED:
+        return None
+    with _github_cache_lock:
+        if _github_cache is None:
+            _github_cache = ConditionalRequestCache(
+                SQLiteCache(GITHUB_CACHE_PATH, "github_responses", GITHUB_CACHE_TTL, GITHUB_CACHE_MAX_BYTES)
+            )
+    return _github_cache
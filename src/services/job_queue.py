@@ -0,0 +1,230 @@
+import logging
+import math
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config.config import WORKER_COUNT, JOB_QUEUE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+    def __init__(self, depth: int, capacity: int, retry_after: int):
+        super().__init__(f"Job queue is full ({depth}/{capacity})")
+        self.depth = depth
+        self.capacity = capacity
+        self.retry_after = retry_after
+
+
+class JobDeferred(Exception):
+    """Raised by a job handler to have the job re-enqueued after `delay` seconds"""
+
+    def __init__(self, delay: float):
+        super().__init__(f"Job deferred for {int(delay)}s")
+        self.delay = delay
+
+
+class LeaseLost(Exception):
+    """Raised in a handler whose worker stalled past its lease after another worker took the work over"""
+
+
+class _Timing:
+    """Running count/total/max for a duration metric"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_seconds': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_seconds': round(self.max, 3),
+        }
+
+
+class JobQueue:
+    """Bounded queue of jobs drained by a fixed pool of worker threads.
+
+    The queue itself only holds job ids; the `jobs` table is the durable
+    record, so anything still `pending` or `processing` when the process
+    stops is picked up again by `recover()` on the next start. The handler
+    is called with the job id, its PDF path and the seconds it sat queued.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str, float], None],
+        num_workers: int = WORKER_COUNT,
+        max_size: int = JOB_QUEUE_MAX_SIZE
+    ):
+        self.handler = handler
+        self.group_handler: Optional[Callable[[str, str, float], None]] = None
+        self.num_workers = max(1, num_workers)
+        self.max_size = max(1, max_size)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_size)
+        self._workers = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._deferred = 0
+        self._wait = _Timing()
+        self._run = _Timing()
+
+    def register_group_handler(self, handler: Callable[[str, str, float], None]):
+        """Handler for job groups, called with the group id in place of a job id"""
+        self.group_handler = handler
+
+    def start(self):
+        if self._workers:
+            return
+        self._stopping.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Started {self.num_workers} job workers (queue size {self.max_size})")
+
+    def stop(self, timeout: float = 5.0):
+        # Whatever is still queued stays `pending` in the database for recover()
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def is_full(self) -> bool:
+        return self._queue.full()
+
+    def ensure_capacity(self):
+        """Raise QueueFullError up front, before the caller does any work for a new job"""
+        if self.is_full():
+            self._reject()
+
+    def retry_after(self) -> int:
+        """Rough number of seconds until a queue slot frees up"""
+        with self._lock:
+            avg_run = self._run.total / self._run.count if self._run.count else 30.0
+        return max(1, math.ceil(avg_run * (self.depth() + 1) / self.num_workers))
+
+    def submit(self, job_id: str, pdf_path: str, handler: Optional[Callable[[str, str, float], None]] = None):
+        """Queue a job for the default handler, or for `handler` if given"""
+        try:
+            self._queue.put_nowait((job_id, pdf_path, time.monotonic(), handler))
+        except queue.Full:
+            self._reject()
+        with self._lock:
+            self._submitted += 1
+
+    def submit_group(self, group_id: str):
+        self.submit(group_id, "", handler=self.group_handler)
+
+    def _reject(self):
+        with self._lock:
+            self._rejected += 1
+        raise QueueFullError(self.depth(), self.max_size, self.retry_after())
+
+    def recover(self):
+        """Re-enqueue jobs left pending or processing by a previous run"""
+        from src.models.database import Job, run_in_transaction
+
+        def _reset_unfinished(db) -> List[Tuple[str, str]]:
+            jobs = (
+                db.query(Job)
+                .filter(Job.status.in_(["pending", "processing"]))
+                .order_by(Job.created_at)
+                .all()
+            )
+            pending = []
+            for job in jobs:
+                if not job.pdf_path:  # type: ignore
+                    job.status = "failed"  # type: ignore
+                    job.error_message = "Job interrupted and cannot be resumed"  # type: ignore
+                    continue
+                job.status = "pending"  # type: ignore
+                pending.append((str(job.job_id), str(job.pdf_path)))
+            return pending
+
+        try:
+            pending = run_in_transaction(_reset_unfinished)
+        except Exception as e:
+            logger.error(f"Failed to recover jobs: {e}")
+            return
+
+        if pending:
+            logger.info(f"Recovering {len(pending)} unfinished jobs")
+            # Blocking puts, so a backlog larger than the queue is fed in as workers free up
+            threading.Thread(target=self._enqueue_all, args=(pending,), daemon=True).start()
+
+    def _enqueue_all(self, jobs, handler=None):
+        for job_id, pdf_path in jobs:
+            self._queue.put((job_id, pdf_path, time.monotonic(), handler))
+            with self._lock:
+                self._submitted += 1
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            job_id, pdf_path, enqueued_at, handler = item
+            started = time.monotonic()
+            with self._lock:
+                self._wait.observe(started - enqueued_at)
+                self._running += 1
+
+            try:
+                (handler or self.handler)(job_id, pdf_path, started - enqueued_at)
+                with self._lock:
+                    self._completed += 1
+            except JobDeferred as e:
+                with self._lock:
+                    self._deferred += 1
+                logger.info(f"Job {job_id} deferred for {int(e.delay)}s")
+                timer = threading.Timer(e.delay, self._enqueue_all, args=([(job_id, pdf_path)], handler))
+                timer.daemon = True
+                timer.start()
+            except Exception as e:
+                logger.error(f"Job {job_id} raised an unhandled error: {e}")
+                with self._lock:
+                    self._failed += 1
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run.observe(time.monotonic() - started)
+                self._queue.task_done()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': "memory",
+                'workers': self.num_workers,
+                'capacity': self.max_size,
+                'queue_depth': self.depth(),
+                'running': self._running,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'deferred': self._deferred,
+                'wait_time': self._wait.as_dict(),
+                'run_time': self._run.as_dict(),
+            }
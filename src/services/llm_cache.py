@@ -0,0 +1,154 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.utils.sqlite_cache import SQLiteCache
+from src.config.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_MEMORY_ENTRIES,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of prompt input, so cosmetic differences still hit the cache"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+class LLMResponseCache:
+    """Caches model response text by (model, prompt version, hash of normalized input).
+
+    A small in-memory LRU sits in front of the persistent SQLite store, so
+    repeat lookups in the same process never leave memory. Only non-empty
+    responses are stored.
+    """
+
+    def __init__(self, store: SQLiteCache, memory_entries: int = LLM_CACHE_MEMORY_ENTRIES):
+        self.store = store
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generations = 0
+        self.generation_seconds = 0.0
+
+    @staticmethod
+    def key(model: str, prompt_version: str, input_text: str) -> str:
+        digest = hashlib.sha256(normalize_text(input_text).encode("utf-8")).hexdigest()
+        return f"{model}:{prompt_version}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return text
+
+        text = self.store.get(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, text)
+        return text
+
+    def set(self, key: str, text: str):
+        self.store.set(key, text)
+        with self._lock:
+            self._remember(key, text)
+
+    def _remember(self, key: str, text: str):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_generate(
+        self,
+        model: str,
+        prompt_version: str,
+        input_text: str,
+        generate: Callable[[], Optional[str]]
+    ) -> Optional[str]:
+        """Return the cached response for this input, calling `generate` on a miss"""
+        key = self.key(model, prompt_version, input_text)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        started = time.perf_counter()
+        text = generate()
+        with self._lock:
+            self.generations += 1
+            self.generation_seconds += time.perf_counter() - started
+        if text:
+            self.set(key, text)
+        return text
+
+    async def aget_or_generate(
+        self,
+        model: str,
+        prompt_version: str,
+        input_text: str,
+        generate: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """Async variant of get_or_generate"""
+        key = self.key(model, prompt_version, input_text)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        started = time.perf_counter()
+        text = await generate()
+        with self._lock:
+            self.generations += 1
+            self.generation_seconds += time.perf_counter() - started
+        if text:
+            self.set(key, text)
+        return text
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_latency = self.generation_seconds / self.generations if self.generations else 0.0
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'avg_generation_seconds': round(avg_latency, 3),
+                # Calls (and their latency) that hits avoided, at the observed average
+                'saved_calls': self.hits,
+                'estimated_seconds_saved': round(self.hits * avg_latency, 1),
+            }
+        store = self.store.stats()
+        stats.update(entries=store['entries'], size_bytes=store['size_bytes'], evictions=store['evictions'])
+        return stats
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache, or None when LLM_CACHE_ENABLED is off"""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(
+                SQLiteCache(LLM_CACHE_PATH, "llm_responses", LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES)
+            )
+    return _llm_cache
@@ -1,27 +1,111 @@
-from google import genai
-from google.genai import types
-import dotenv
 import logging
 import re
 import ast
 import json
 import os
-from typing import List
+import asyncio
+import random
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from src.services.llm_cache import get_llm_cache
+from src.config.config import (
+    LLM_MAX_INPUT_CHARS,
+    LLM_MODEL,
+    LLM_MAX_CONCURRENCY,
+    LLM_CALL_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_CHUNK_TOKENS,
+    LLM_JOB_TOKEN_BUDGET,
+    LLM_LEADING_PAGES,
+    METADATA_BATCH_SIZE,
+)
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from google.genai import Client, types
 
-dotenv.load_dotenv() 
-client = genai.Client()
 
-search_tool = types.Tool(
-    google_search=types.GoogleSearch()
-)
+# google-genai takes most of a second to import, so the client is only built when a job needs it
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> "Client":
+    """The process-wide Gemini client, created on first use (a missing GEMINI_API_KEY fails that call, not startup)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            _client = genai.Client()
+        return _client
+
 
 USE_GROUNDING = True
 
+# Bump when a prompt changes so cached answers to the old prompt are not reused
+NAME_PROMPT_VERSION = "names-v1"
+METADATA_PROMPT_VERSION = "metadata-v2"
+
+
+def _generate(
+    prompt_version: str,
+    cache_input: str,
+    prompt: str,
+    config: Optional["types.GenerateContentConfig"]
+) -> Optional[str]:
+    """Run the prompt through the model, answering from the LLM cache when `cache_input` was seen before"""
+    def call() -> Optional[str]:
+        response = get_client().models.generate_content(
+            model=LLM_MODEL,
+            contents=prompt,
+            config=config
+        )
+        return response.text if response else None
+
+    cache = get_llm_cache()
+    if cache is None:
+        return call()
+    return cache.get_or_generate(LLM_MODEL, _cache_version(prompt_version, config), cache_input, call)
+
+
+def _cache_version(prompt_version: str, config: Optional["types.GenerateContentConfig"]) -> str:
+    return f"{prompt_version}+grounded" if config else prompt_version
+
+
+async def _agenerate(
+    prompt_version: str,
+    cache_input: str,
+    prompt: str,
+    config: Optional["types.GenerateContentConfig"],
+    semaphore: asyncio.Semaphore
+) -> Optional[str]:
+    """Async _generate: at most `semaphore` calls in flight, each bounded by
+    LLM_CALL_TIMEOUT and retried up to LLM_MAX_RETRIES times with jittered backoff."""
+    async def call() -> Optional[str]:
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with semaphore:
+                    response = await asyncio.wait_for(
+                        get_client().aio.models.generate_content(model=LLM_MODEL, contents=prompt, config=config),
+                        timeout=LLM_CALL_TIMEOUT
+                    )
+                return response.text if response else None
+            except Exception as e:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = min(10.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        return None
+
+    cache = get_llm_cache()
+    if cache is None:
+        return await call()
+    return await cache.aget_or_generate(LLM_MODEL, _cache_version(prompt_version, config), cache_input, call)
+
 
 def parse_list_from_response(response_text: str) -> List[str]:
     list_pattern = r'\[.*?\]'
@@ -44,46 +128,59 @@ def parse_list_from_response(response_text: str) -> List[str]:
     return matches if matches else []
 
 
+def _names_prompt(text: str) -> str:
+    return (
+        "Extract all GitHub organization usernames of tech companies mentioned in this text. "
+        "For example, if you see 'github.com/microsoft' or 'Microsoft's GitHub (microsoft)', "
+        "extract 'microsoft'. Include both explicit mentions and implied GitHub handles. "
+        "Return ONLY a Python list of lowercase usernames without explanation. "
+        "Example response: ['google', 'microsoft', 'facebook']\n\n"
+        f"{text}"
+    )
+
+
+def _grounded_config() -> "types.GenerateContentConfig":
+    from google.genai import types
+    return types.GenerateContentConfig(
+        tools=[types.Tool(google_search=types.GoogleSearch())]
+    )
+
+
+def _names_config() -> Optional["types.GenerateContentConfig"]:
+    if not USE_GROUNDING:
+        return None
+    return _grounded_config()
+
+
+def _clean_usernames(usernames: List[str]) -> List[str]:
+    clean_usernames = []
+    for name in usernames:
+        clean_name = str(name).replace('github.com/', '')
+        clean_name = clean_name.strip().lower()
+        
+        if clean_name:
+            clean_usernames.append(clean_name)
+    return clean_usernames
+
+
 def github_name_extractor(pdf_text: str) -> List[str]:
     if not pdf_text or pdf_text.strip() == "":
         print("Warning: Empty PDF text!")
         return []
     
     try:
-        max_chars = 10000  
-        trimmed_text = pdf_text[:max_chars]
-        
-        prompt = (
-            "Extract all GitHub organization usernames of tech companies mentioned in this text. "
-            "For example, if you see 'github.com/microsoft' or 'Microsoft's GitHub (microsoft)', "
-            "extract 'microsoft'. Include both explicit mentions and implied GitHub handles. "
-            "Return ONLY a Python list of lowercase usernames without explanation. "
-            "Example response: ['google', 'microsoft', 'facebook']\n\n"
-            f"{trimmed_text}"
-        )
-        
-        config = types.GenerateContentConfig(
-            tools=[search_tool]
-        )
+        trimmed_text = pdf_text[:LLM_MAX_INPUT_CHARS]
         
         print("Extracting GitHub usernames...")
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",  
-            contents=prompt,
-            config=config if USE_GROUNDING else None
+        response_text = _generate(
+            NAME_PROMPT_VERSION,
+            trimmed_text,
+            _names_prompt(trimmed_text),
+            _names_config()
         )
         
-        if response and response.text:
-            usernames = parse_list_from_response(response.text)
-            
-            clean_usernames = []
-            for name in usernames:
-                clean_name = name.replace('github.com/', '')
-                clean_name = clean_name.strip().lower()
-                
-                if clean_name:
-                    clean_usernames.append(clean_name)
-            
+        if response_text:
+            clean_usernames = _clean_usernames(parse_list_from_response(response_text))
             print(f"Found {len(clean_usernames)} GitHub usernames: {clean_usernames}")
             return clean_usernames
         else:
@@ -93,60 +190,295 @@ def github_name_extractor(pdf_text: str) -> List[str]:
     except Exception as e:
         print(f"Error extracting GitHub usernames: {str(e)}")
         return []
-        
-        
-def extract_github_metadata(usernames: List[str]) -> List[dict]:
-   
-    if not usernames:
-        return []
-        
-    all_results = []
+
+
+# Cheap check for text that could name a company or its GitHub presence
+_CANDIDATE_SIGNALS = re.compile(
+    r"github|gitlab|open[- ]?source|repositor|developer|engineering|\bsdk\b|\bapi\b"
+    r"|\b(?:inc|corp|corporation|ltd|llc|gmbh|plc|technologies|labs|software|systems|partners?|customers?)\b"
+    r"|\b[\w-]+\.(?:com|io|dev|ai|org|net|co)\b",
+    re.IGNORECASE
+)
+
+
+def has_candidate_signal(text: str) -> bool:
+    """Whether a text shows any sign of naming a company or project worth asking the model about"""
+    return bool(_CANDIDATE_SIGNALS.search(text))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) used for budgeting"""
+    return len(text) // 4 + 1
+
+
+def _page_chunks(pages: Dict[int, str], max_tokens: int = LLM_CHUNK_TOKENS) -> List[Tuple[List[int], str]]:
+    """chunk_pages, with the page numbers that went into each chunk"""
+    max_chars = max_tokens * 4
+    pieces = []
+    for number, text in sorted(pages.items()):
+        if len(text) <= max_chars:
+            pieces.append((number, text))
+            continue
+        for paragraph in text.split("\n\n"):
+            pieces.extend((number, paragraph[i:i + max_chars]) for i in range(0, len(paragraph), max_chars))
+    
+    chunks = []
+    current = []
+    numbers = []
+    current_chars = 0
+    for number, piece in pieces:
+        if current and current_chars + len(piece) + 2 > max_chars:
+            chunks.append((numbers, "\n\n".join(current)))
+            current = []
+            numbers = []
+            current_chars = 0
+        current.append(piece)
+        if number not in numbers:
+            numbers.append(number)
+        current_chars += len(piece) + 2
+    if current:
+        chunks.append((numbers, "\n\n".join(current)))
+    return chunks
+
+
+def chunk_pages(pages: Dict[int, str], max_tokens: int = LLM_CHUNK_TOKENS) -> List[str]:
+    """Group page texts, in page order, into chunks of at most `max_tokens`.
+
+    Pages longer than a chunk are split on paragraph boundaries, or hard-split
+    when a single paragraph is still too long.
+    """
+    return [text for _, text in _page_chunks(pages, max_tokens)]
+
+
+def select_chunks(
+    chunks: List[str],
+    token_budget: int = LLM_JOB_TOKEN_BUDGET,
+    priority: Optional[List[int]] = None
+) -> List[str]:
+    """Chunks worth sending, in document order, within the job's token budget.
+
+    The first chunk is always kept, even over budget (it is what the
+    single-call extractor used to see); later chunks need at least one
+    candidate signal. Chunks are considered in document order, or in the
+    order of the chunk indexes in `priority`, until the budget runs out.
+    """
+    overhead = estimate_tokens(_names_prompt(""))
+    order = [0, *(position for position in (priority if priority is not None else range(len(chunks))) if position != 0)]
+    selected = []
+    spent = 0
+    for position in order[:len(chunks)]:
+        chunk = chunks[position]
+        if position > 0 and not has_candidate_signal(chunk):
+            continue
+        cost = estimate_tokens(chunk) + overhead
+        if selected and spent + cost > token_budget:
+            logger.info(f"Token budget of {token_budget} reached, skipping remaining chunks")
+            break
+        selected.append(position)
+        spent += cost
+    return [chunks[position] for position in sorted(selected)]
+
+
+def _chunk_priority(chunk_numbers: List[List[int]], page_order: List[int], leading_pages: int = LLM_LEADING_PAGES) -> List[int]:
+    """Chunk indexes: those holding the document's opening pages first, in document order,
+    then the rest by their best-ranked page in `page_order`"""
+    first_pages = set(sorted(number for numbers in chunk_numbers for number in numbers)[:leading_pages])
+    rank = {number: position for position, number in enumerate(page_order)}
+    leading = [index for index, numbers in enumerate(chunk_numbers) if first_pages.intersection(numbers)]
+    rest = [index for index in range(len(chunk_numbers)) if index not in leading]
+    rest.sort(key=lambda index: min(rank.get(number, len(rank)) for number in chunk_numbers[index]))
+    return leading + rest
+
+
+async def aextract_github_names(
+    pages: Dict[int, str],
+    token_budget: int = LLM_JOB_TOKEN_BUDGET,
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    page_order: Optional[List[int]] = None
+) -> List[str]:
+    """Map-reduce github_name_extractor over the whole document.
+
+    Candidate chunks are sent concurrently and the per-chunk handle lists are
+    merged in document order without duplicates. A failed chunk contributes
+    nothing instead of failing the job. The opening pages are always read
+    first; with `page_order` (e.g. text-dense pages first) the rest of the
+    token budget goes to pages in that order rather than document order.
+    """
+    page_chunks = _page_chunks(pages)
+    chunks = [text for _, text in page_chunks]
+    priority = _chunk_priority([numbers for numbers, _ in page_chunks], page_order) if page_order is not None else None
+    selected = select_chunks(chunks, token_budget, priority)
+    print(f"Extracting GitHub usernames from {len(selected)} of {len(chunks)} chunks...")
+    
+    config = _names_config()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def extract(chunk: str) -> List[str]:
+        try:
+            response_text = await _agenerate(NAME_PROMPT_VERSION, chunk, _names_prompt(chunk), config, semaphore)
+            return _clean_usernames(parse_list_from_response(response_text)) if response_text else []
+        except Exception as e:
+            print(f"Error extracting GitHub usernames from chunk: {str(e)}")
+            return []
     
-    config = None
-    if USE_GROUNDING:
-        config = types.GenerateContentConfig(
-            tools=[search_tool]
+    results = await asyncio.gather(*(extract(chunk) for chunk in selected))
+    usernames = list(dict.fromkeys(name for names in results for name in names))
+    print(f"Found {len(usernames)} GitHub usernames: {usernames}")
+    return usernames
+
+
+def github_name_extractor_chunked(
+    pages: Dict[int, str],
+    token_budget: int = LLM_JOB_TOKEN_BUDGET,
+    page_order: Optional[List[int]] = None
+) -> List[str]:
+    """Blocking wrapper around aextract_github_names for worker threads"""
+    if not pages:
+        print("Warning: Empty PDF text!")
+        return []
+    return asyncio.run(aextract_github_names(pages, token_budget, page_order=page_order))
+
+
+def _metadata_prompt(usernames: List[str]) -> str:
+    if len(usernames) == 1:
+        return (
+            f"Tell me about GitHub org '{usernames[0]}'. "
+            "Format as JSON with these fields: "
+            "{username, full_name, description, website, industry, employee_count}"
         )
+    names = ", ".join(f"'{username}'" for username in usernames)
+    return (
+        f"Tell me about each of these GitHub orgs: {names}. "
+        "Return ONLY a JSON array with one object per org, in the same order, each with these fields: "
+        "{username, full_name, description, website, industry, employee_count}"
+    )
+
+
+def _parse_metadata(usernames: List[str], response_text: str) -> Dict[str, dict]:
+    """Map each requested username to its JSON object; usernames missing from the answer are left out"""
+    pattern = r'\{.*\}' if len(usernames) == 1 else r'\[.*\]'
+    match = re.search(pattern, response_text, re.DOTALL)
+    if not match:
+        return {}
     
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        data = json.loads(match.group(0).replace("'", "\""))
+    items = [data] if isinstance(data, dict) else [item for item in data if isinstance(item, dict)]
+    
+    found = {}
+    requested = {username.lower(): username for username in usernames}
+    for position, item in enumerate(items):
+        username = requested.get(str(item.get("username", "")).lower())
+        if username is None and len(items) == len(usernames):
+            username = usernames[position]  # model rewrote the name; trust the order we asked for
+        if username is not None:
+            found[username] = item
+    return found
+
+
+def _cached_metadata(usernames: List[str], config: Optional["types.GenerateContentConfig"]) -> Dict[str, dict]:
+    """Per-org answers already in the LLM cache, whichever batch they were fetched in"""
+    cache = get_llm_cache()
+    if cache is None:
+        return {}
+    found = {}
     for username in usernames:
-        if not username or username.strip() == "":
-            continue
-            
+        text = cache.get(cache.key(LLM_MODEL, _cache_version(METADATA_PROMPT_VERSION, config), username))
+        if text:
+            try:
+                found[username] = json.loads(text)
+            except json.JSONDecodeError:
+                pass
+    return found
+
+
+def _store_metadata(found: Dict[str, dict], config: Optional["types.GenerateContentConfig"]):
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    for username, data in found.items():
+        cache.set(cache.key(LLM_MODEL, _cache_version(METADATA_PROMPT_VERSION, config), username), json.dumps(data))
+
+
+def _metadata_config() -> Optional["types.GenerateContentConfig"]:
+    if not USE_GROUNDING:
+        return None
+    return _grounded_config()
+
+
+def _metadata_results(usernames: List[str], found: Dict[str, dict]) -> List[dict]:
+    results = []
+    for username in usernames:
+        if username in found:
+            print(f"Found info for {username}")
+            results.append(found[username])
+        else:
+            results.append({"username": username})
+    return results
+
+
+def extract_github_metadata(usernames: List[str], batch_size: int = METADATA_BATCH_SIZE) -> List[dict]:
+    """One metadata dict per username, asking about `batch_size` orgs per model call.
+
+    Orgs the model does not answer for fall back to {"username": ...}.
+    """
+    usernames = [username for username in (usernames or []) if username and username.strip() != ""]
+    if not usernames:
+        return []
+    
+    config = _metadata_config()
+    found = _cached_metadata(usernames, config)
+    pending = list(dict.fromkeys(username for username in usernames if username not in found))
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
         try:
-           
-            prompt = (
-                f"Tell me about GitHub org '{username}'. "
-                "Format as JSON with these fields: "
-                "{username, full_name, description, website, industry, employee_count}"
-            )
-            
-            
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
+            response = get_client().models.generate_content(
+                model=LLM_MODEL,
+                contents=_metadata_prompt(batch),
                 config=config
             )
-            
             if response and response.text:
-            
-                try:
-                    
-                    json_pattern = r'\{.*\}'
-                    match = re.search(json_pattern, response.text, re.DOTALL)
-                    
-                    if match:
-                        
-                        json_str = match.group(0).replace("'", "\"")
-                        data = json.loads(json_str)
-                        all_results.append(data)
-                        print(f"Found info for {username}")
-                    else:
-                        all_results.append({"username": username})
-                except Exception as e:
-                    print(f"Error parsing JSON for {username}: {str(e)}")
-                    all_results.append({"username": username})
+                answered = _parse_metadata(batch, response.text)
+                _store_metadata(answered, config)
+                found.update(answered)
+        except Exception as e:
+            print(f"API error for {', '.join(batch)}: {str(e)}")
+    
+    return _metadata_results(usernames, found)
+
+
+async def aextract_github_metadata(
+    usernames: List[str],
+    batch_size: int = METADATA_BATCH_SIZE,
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+) -> List[dict]:
+    """Async extract_github_metadata: all batches go out concurrently via client.aio"""
+    usernames = [username for username in (usernames or []) if username and username.strip() != ""]
+    if not usernames:
+        return []
+    
+    config = _metadata_config()
+    found = _cached_metadata(usernames, config)
+    pending = list(dict.fromkeys(username for username in usernames if username not in found))
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def fetch(batch: List[str]) -> Dict[str, dict]:
+        try:
+            # Cache key is the batch itself; per-org answers are stored separately below
+            response_text = await _agenerate(
+                METADATA_PROMPT_VERSION + "-batch", ",".join(batch), _metadata_prompt(batch), config, semaphore
+            )
+            return _parse_metadata(batch, response_text) if response_text else {}
         except Exception as e:
-            print(f"API error for {username}: {str(e)}")
-            all_results.append({"username": username})
+            print(f"API error for {', '.join(batch)}: {str(e)}")
+            return {}
+    
+    for answered in await asyncio.gather(*(fetch(batch) for batch in batches)):
+        _store_metadata(answered, config)
+        found.update(answered)
     
-    return all_results
+    return _metadata_results(usernames, found)
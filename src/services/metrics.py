@@ -0,0 +1,116 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans cache hits (milliseconds) up to slow LLM calls and large org fetches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format.
+
+    A small in-process stand-in for prometheus_client's Histogram, so the
+    service can expose /metrics without another dependency. Label values
+    are passed to `observe` in the order of `label_names`.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> (per-bucket counts with a trailing +Inf slot, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, seconds: float, *label_values: str):
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._series.setdefault(label_values, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for label_values, counts, total in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join([*labels, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+stage_duration = Histogram(
+    "gitdigger_job_stage_duration_seconds",
+    "Time spent in each stage of processing a document",
+    label_names=("stage",)
+)
+job_duration = Histogram(
+    "gitdigger_job_duration_seconds",
+    "Time from a worker picking up a job until it finished, by final status",
+    label_names=("status",)
+)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in (stage_duration, job_duration):
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Collects per-stage durations of one job and feeds them to stage_duration.
+
+    `timings` maps stage names to seconds; per-organization GitHub fetch
+    times are kept under 'github_orgs' and observed as the 'github_org'
+    stage, so org names never become label values.
+    """
+
+    def __init__(self):
+        self.timings: Dict = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()  # Stages of one job may run on several threads
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name] = round(self.timings.get(name, 0.0) + seconds, 4)
+        stage_duration.observe(seconds, name)
+
+    def record_orgs(self, org_seconds: Dict[str, float]):
+        with self._lock:
+            orgs = self.timings.setdefault('github_orgs', {})
+            for org_name, seconds in org_seconds.items():
+                orgs[org_name] = round(seconds, 4)
+        for seconds in org_seconds.values():
+            stage_duration.observe(seconds, 'github_org')
+
+    def finish(self, status: str) -> Dict:
+        total = time.perf_counter() - self._started
+        self.timings['total'] = round(total, 4)
+        job_duration.observe(total, status)
+        return self.timings
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Tuple
+
+from src.config.config import ORG_CACHE_TTL, ORG_CACHE_MAX_ENTRIES
+
+
+def _copy(org_data: Dict) -> Dict:
+    # Callers annotate member dicts in place, so nobody gets the cached objects themselves
+    return {**org_data, 'github_members': [dict(member) for member in org_data['github_members']]}
+
+
+class OrgDataCache:
+    """In-memory cache of get_organization_data results shared by every job.
+
+    Results are keyed by (org, max_members) and reused for `ttl` seconds. A
+    caller asking for an org that another job is already fetching waits for
+    that fetch instead of starting its own, from any thread or event loop.
+    Only successful lookups are cached.
+    """
+
+    def __init__(self, ttl: float = ORG_CACHE_TTL, max_entries: int = ORG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Dict]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, int], Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _claim(self, key: Tuple[str, int]) -> Tuple[bool, object]:
+        """Return (True, cached result), (False, future to wait on) or (False, None) if the caller should fetch"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, org_data = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, org_data
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return False, future
+
+            self.misses += 1
+            self._in_flight[key] = Future()
+            return False, None
+
+    def _settle(self, key: Tuple[str, int], org_data: Dict = None, error: BaseException = None): # type: ignore
+        with self._lock:
+            future = self._in_flight.pop(key)
+            if error is None and org_data.get('success'):
+                self._entries[key] = (time.monotonic(), org_data)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(org_data)
+
+    @staticmethod
+    def _key(org_name: str, max_members: int) -> Tuple[str, int]:
+        return org_name.lower(), max_members
+
+    def get_or_load(self, org_name: str, max_members: int, loader: Callable[[], Dict]) -> Dict:
+        key = self._key(org_name, max_members)
+        cached, found = self._claim(key)
+        if cached:
+            return _copy(found) # type: ignore
+        if found is not None:
+            return _copy(found.result()) # type: ignore
+
+        try:
+            org_data = loader()
+        except BaseException as e:
+            self._settle(key, error=e)
+            raise
+        self._settle(key, org_data)
+        return _copy(org_data)
+
+    async def aget_or_load(self, org_name: str, max_members: int, loader: Callable[[], Awaitable[Dict]]) -> Dict:
+        key = self._key(org_name, max_members)
+        cached, found = self._claim(key)
+        if cached:
+            return _copy(found) # type: ignore
+        if found is not None:
+            return _copy(await asyncio.wrap_future(found)) # type: ignore
+
+        try:
+            org_data = await loader()
+        except BaseException as e:
+            self._settle(key, error=e)
+            raise
+        self._settle(key, org_data)
+        return _copy(org_data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            }
+
+
+org_data_cache = OrgDataCache()
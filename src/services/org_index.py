@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import json
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.database import Organization, OrgMembership, bulk_insert_memberships, run_in_transaction
+from src.services.rate_limit import RateLimitExceeded
+from src.config.config import ORG_INDEX_FRESH_SECONDS, ORG_INDEX_MAX_AGE_SECONDS, ORG_REFRESH_BATCH
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND_ERROR = "Organization not found"
+
+
+class IndexedOrganization:
+    """An organization snapshot read from the index, without its members"""
+
+    def __init__(self, org: Organization, now: datetime.datetime):
+        self.id = int(org.id)  # type: ignore
+        self.login = str(org.login)
+        self.status = str(org.status)
+        self.num_members = int(org.num_members or 0)  # type: ignore
+        self.fetched_at: datetime.datetime = org.fetched_at  # type: ignore
+        self.age = (now - self.fetched_at).total_seconds()
+
+    @property
+    def stale(self) -> bool:
+        return self.age > ORG_INDEX_FRESH_SECONDS
+
+    def as_result(self) -> Dict:
+        """The snapshot in the shape of a GitHub lookup result, for callers that record job outcomes"""
+        if self.status == "found":
+            return {'success': True, 'num_members': self.num_members, 'from_index': True}
+        return {'success': False, 'num_members': 0, 'error': NOT_FOUND_ERROR, 'not_found': True, 'from_index': True}
+
+
+def snapshot_status(org_data: Dict) -> Optional[str]:
+    """'found' or 'not_found' for a lookup worth keeping, None for a failed one.
+
+    Only a lookup GitHub answered with a 404 is 'not_found'; timeouts, 5xx and
+    other failures are None so they are never stored as a snapshot.
+    """
+    if org_data.get('success'):
+        return "found"
+    if org_data.get('not_found'):
+        return "not_found"
+    return None
+
+
+def lookup_organizations(org_names: Iterable[str], max_age: float = ORG_INDEX_MAX_AGE_SECONDS) -> Dict[str, IndexedOrganization]:
+    """Snapshots of the given orgs that are at most `max_age` seconds old, keyed by name"""
+    org_names = list(dict.fromkeys(org_names))
+    if not org_names:
+        return {}
+
+    def _load(db: Session) -> Dict[str, IndexedOrganization]:
+        now = datetime.datetime.now()
+        oldest = now - datetime.timedelta(seconds=max_age)
+        rows = db.query(Organization).filter(Organization.login.in_(org_names), Organization.fetched_at >= oldest).all()
+        return {str(org.login): IndexedOrganization(org, now) for org in rows}
+    return run_in_transaction(_load)
+
+
+def store_organization(org_name: str, org_data: Dict) -> Optional[int]:
+    """Make `org_data` the org's snapshot and return its id, or None if the lookup failed.
+
+    Members are diffed against the previous snapshot, so unchanged members
+    keep their ids (and pagination cursors into them stay valid).
+    """
+    status = snapshot_status(org_data)
+    if status is None:
+        return None
+    found_members = (org_data.get('github_members') or []) if status == "found" else []
+    members = {member['login']: member for member in found_members if member.get('login')}
+    org_info = org_data.get('organization_info') or {}
+
+    def _store(db: Session) -> int:
+        org = db.query(Organization).filter(Organization.login == org_name).first()
+        if org is None:
+            org = Organization(login=org_name)
+            db.add(org)
+        org.status = status  # type: ignore
+        org.name = org_data.get('company_name') if status == "found" else None  # type: ignore
+        org.info = json.dumps(org_info) if org_info else None  # type: ignore
+        org.num_members = org_data.get('num_members', len(members)) if status == "found" else 0  # type: ignore
+        org.fetched_at = datetime.datetime.now()  # type: ignore
+        db.flush()
+
+        existing = {
+            row.login: row
+            for row in db.query(
+                OrgMembership.id, OrgMembership.login, OrgMembership.avatar_url, OrgMembership.html_url, OrgMembership.member_type
+            ).filter(OrgMembership.organization_id == org.id)
+        }
+        gone = [row.id for login, row in existing.items() if login not in members]
+        for start in range(0, len(gone), 500):
+            db.query(OrgMembership).filter(OrgMembership.id.in_(gone[start:start + 500])).delete(synchronize_session=False)
+        changed = [
+            {'id': existing[login].id, 'avatar_url': member.get('avatar_url', ''), 'html_url': member.get('html_url', ''), 'member_type': member.get('type', '')}
+            for login, member in members.items()
+            if login in existing and (existing[login].avatar_url, existing[login].html_url, existing[login].member_type)
+            != (member.get('avatar_url', ''), member.get('html_url', ''), member.get('type', ''))
+        ]
+        if changed:
+            db.bulk_update_mappings(OrgMembership, changed)  # type: ignore
+        bulk_insert_memberships(db, org.id, (member for login, member in members.items() if login not in existing))  # type: ignore
+        return int(org.id)  # type: ignore
+
+    try:
+        return run_in_transaction(_store)
+    except IntegrityError:
+        # Another worker stored the same org first; update its row instead
+        return run_in_transaction(_store)
+
+
+class OrgRefresher:
+    """Refreshes stale organization snapshots from GitHub on a background thread.
+
+    Jobs keep using a stale snapshot and only `request` a refresh, so they
+    never wait on GitHub for an org the index already has. Requests for an
+    org that is already queued are dropped. If GitHub's rate limit runs out
+    the queued refreshes are dropped too; the next job that sees the org
+    stale asks again.
+    """
+
+    def __init__(self, batch_size: int = ORG_REFRESH_BATCH):
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: Dict[str, None] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.requested = 0
+        self.refreshed = 0
+        self.failed = 0
+
+    def request(self, org_names: Iterable[str]):
+        with self._lock:
+            for org_name in org_names:
+                if org_name not in self._pending:
+                    self._pending[org_name] = None
+                    self.requested += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="org-refresher", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def _next_batch(self) -> List[str]:
+        with self._lock:
+            while not self._pending:
+                self._wakeup.wait()
+            return list(self._pending)[:self.batch_size]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                asyncio.run(self._refresh(batch))
+            except RateLimitExceeded as e:
+                logger.warning(f"Stopped refreshing organizations: {e}")
+                with self._lock:
+                    self.failed += len(self._pending)
+                    self._pending.clear()
+            except Exception as e:
+                logger.error(f"Failed to refresh organizations {', '.join(batch)}: {e}")
+                with self._lock:
+                    self.failed += len(batch)
+            with self._lock:
+                for org_name in batch:
+                    self._pending.pop(org_name, None)
+
+    async def _refresh(self, org_names: List[str]):
+        from src.services.github_service import AsyncGitHubService
+
+        async def _store(org_name: str, org_data: Dict):
+            stored = await asyncio.to_thread(store_organization, org_name, org_data)
+            with self._lock:
+                if stored is None:
+                    self.failed += 1
+                else:
+                    self.refreshed += 1
+
+        async with AsyncGitHubService(job_id="org-refresh") as github_service:
+            await github_service.get_organizations_data(org_names, on_result=_store)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'requested': self.requested,
+                'refreshed': self.refreshed,
+                'failed': self.failed,
+            }
+
+
+org_refresher = OrgRefresher()
@@ -1,44 +1,411 @@
-import pdfplumber
 import os
 import logging
-from typing import Dict, List, Union, Optional
+import mmap
+import multiprocessing
+import signal
+import threading
+import time
+from contextlib import closing, contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple, Union, Optional
+from src.config.config import (
+    PDF_PARSE_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PARSE_TIMEOUT,
+    PDF_PARSE_TIMEOUT_PER_MB,
+    PDF_PARSE_MAX_RSS_MB,
+)
 
 # setup basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    import pdfplumber
+
+
+class PDFBudgetExceeded(Exception):
+    """Parsing a document ran past its time or memory budget"""
+
+
+def _rss_mb() -> float:
+    """Current resident memory of this process, 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        return 0.0
+
+
+class ParseBudget:
+    """Time and memory limits for parsing one document.
+
+    Only enforced where the document is parsed in a process of its own, a
+    pool worker (see `_extract_pages_parallel`): with a memory limit set,
+    each worker parses one batch and exits, so its RSS is that document's,
+    and the deadline interrupts even a single slow page. The
+    job side stops waiting on the pool at the same deadline. The deadline
+    is wall-clock time, so it means the same in every process.
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_rss_mb: int = 0):
+        self.deadline = deadline
+        self.max_rss_mb = max_rss_mb
+
+    @classmethod
+    def for_file(cls, pdf_path: str) -> "ParseBudget":
+        """The configured budget, with the time limit scaled by the file's size"""
+        deadline = None
+        if PDF_PARSE_TIMEOUT > 0:
+            size_mb = os.path.getsize(pdf_path) / 1024 / 1024
+            deadline = time.time() + PDF_PARSE_TIMEOUT + PDF_PARSE_TIMEOUT_PER_MB * size_mb
+        return cls(deadline, PDF_PARSE_MAX_RSS_MB)
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else max(0.0, self.deadline - time.time())
+
+    def check(self, page_number: int):
+        if self.deadline is not None and time.time() > self.deadline:
+            raise PDFBudgetExceeded(f"PDF parsing ran out of time at page {page_number}")
+        if self.max_rss_mb:
+            rss = _rss_mb()
+            if rss > self.max_rss_mb:
+                raise PDFBudgetExceeded(f"PDF parsing used {rss:.0f} MB at page {page_number}, over the {self.max_rss_mb} MB limit")
+
+
+def _open_pdf(pdf_path: str) -> "pdfplumber.PDF":
+    # pdfplumber and pdfminer are imported on first use, keeping them out of API startup
+    import pdfplumber
+    # Reading through a read-only map keeps the file in the shared page cache instead of
+    # per-process buffers; the pool workers parsing one document all read the same pages
+    with open(pdf_path, "rb") as f:
+        try:
+            stream = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            return pdfplumber.open(pdf_path)
+    try:
+        pdf = pdfplumber.open(stream)
+    except Exception:
+        stream.close()
+        raise
+    pdf.stream_is_external = False  # so closing the PDF unmaps the file
+    return pdf
+
+
+@contextmanager
+def _interrupt_at(deadline: Optional[float]):
+    """Raise PDFBudgetExceeded when `deadline` passes, even in the middle of a page.
+
+    Uses SIGALRM, so it only acts on a process's main thread, which is
+    where pool workers run their tasks.
+    """
+    if deadline is None or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def _expired(signum, frame):
+        raise PDFBudgetExceeded("PDF parsing ran out of time")
+    
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, max(0.001, deadline - time.time()))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _visit_pages(
+    pdf: "pdfplumber.PDF",
+    page_numbers: Optional[Iterable[int]] = None,
+    budget: Optional[ParseBudget] = None
+) -> Iterator[Tuple[int, "pdfplumber.page.Page"]]:
+    """Yield (page_number, page), releasing each page's parsed objects once the caller moves on.
+
+    pdfplumber keeps every object and text map of a visited page until it
+    is closed, so without this memory grows with the page count.
+    """
+    numbers = page_numbers if page_numbers is not None else range(1, len(pdf.pages) + 1)
+    for number in numbers:
+        page = pdf.pages[number - 1]
+        try:
+            yield number, page
+        finally:
+            page.close()
+        if budget is not None:
+            budget.check(number)
+
+
+def _page_text(page: "pdfplumber.page.Page") -> str:
+    # Collecting the characters is cheap next to the layout analysis; a page that draws none needs no layout
+    return (page.extract_text() or "") if page.chars else ""
+
+
+def _extract_page_numbers(pdf_path: str, page_numbers: List[int], budget: Optional[ParseBudget] = None) -> List[str]:
+    """Text of the given (1-based) pages, run inside a worker process when there is a `budget`"""
+    with _interrupt_at(budget.deadline if budget else None), _open_pdf(pdf_path) as pdf:
+        return [_page_text(page) for _, page in _visit_pages(pdf, page_numbers, budget)]
+
+
+def _resource_contents(resources, depth: int = 0) -> Tuple[bool, int]:
+    """Whether a resource dictionary can draw text (it has fonts, directly or in a
+    form XObject) and how many images it holds, without interpreting any content stream"""
+    from pdfminer.pdftypes import resolve1
+
+    resources = resolve1(resources)
+    if not isinstance(resources, dict):
+        return False, 0
+    has_fonts = bool(resolve1(resources.get("Font")))
+    images = 0
+    xobjects = resolve1(resources.get("XObject"))
+    for xobject in (xobjects.values() if isinstance(xobjects, dict) else ()):
+        attrs = getattr(resolve1(xobject), "attrs", {})
+        subtype = getattr(resolve1(attrs.get("Subtype")), "name", None)
+        if subtype == "Image":
+            images += 1
+        elif subtype == "Form" and depth < 4:
+            form_fonts, form_images = _resource_contents(attrs.get("Resources"), depth + 1)
+            has_fonts = has_fonts or form_fonts
+            images += form_images
+    return has_fonts, images
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Created lazily inside a threaded server: forking it could copy a held lock into a
+            # worker and deadlock it, so workers start from a clean interpreter instead
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            # A reused worker keeps the memory of the documents it parsed before (allocator arenas,
+            # pdfminer caches), which would count against the next one: under a memory limit every
+            # batch gets a fresh worker
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PDF_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+                max_tasks_per_child=1 if PDF_PARSE_MAX_RSS_MB else None,
+            )
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    """Drop a pool one of whose workers died, so the next parse starts a fresh one.
+
+    A ProcessPoolExecutor stays broken for good once a worker is killed
+    (e.g. by the OOM killer); every later submit would fail.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
 class PDFService:
     @staticmethod
-    def extract_text(pdf_path: str) -> str:
+    def triage(pdf_path: str) -> Dict:
+        """Sort the pages by what they can contain, reading only their resources.
+
+        Returns {'pages': page count, 'text_pages': pages with fonts,
+        'image_pages': pages with images but no fonts}. A page without fonts
+        cannot have a text layer, so a scanned document comes back with no
+        text pages in milliseconds, before any layout analysis.
+        """
+        triage: Dict = {'pages': 0, 'text_pages': [], 'image_pages': []}
+        with _open_pdf(pdf_path) as pdf:
+            triage['pages'] = len(pdf.pages)
+            for i, page in enumerate(pdf.pages, 1):
+                has_fonts, images = _resource_contents(page.page_obj.resources)
+                if has_fonts:
+                    triage['text_pages'].append(i)
+                elif images:
+                    triage['image_pages'].append(i)
+        return triage
+
+    @staticmethod
+    def rank_pages(pages: Dict[int, str]) -> List[int]:
+        """Page numbers, most text first (ties in page order)"""
+        return sorted(pages, key=lambda number: (-len(pages[number]), number))
+
+    @staticmethod
+    def iter_pages(pdf_path: str, page_numbers: Optional[List[int]] = None) -> Iterator[Tuple[int, str]]:
+        """Lazily yield (page_number, text) for every page that has text.
+
+        Pages are parsed only as the caller asks for them, so stopping early
+        skips the rest of the document. `page_numbers` limits parsing to those
+        pages, e.g. the text pages found by `triage`. Each page is released
+        once parsed.
+        """
+        with _open_pdf(pdf_path) as pdf:
+            for i, page in _visit_pages(pdf, page_numbers):
+                page_text = _page_text(page)
+                if page_text:
+                    yield i, page_text
+
+    @staticmethod
+    def extract_text(pdf_path: str, max_chars: Optional[int] = None, parallel: bool = False) -> str:
+        """Extract the document text, pages separated by blank lines.
+
+        With `max_chars`, parsing stops at the first page that brings the text
+        to at least that many characters; the result is a prefix of the full
+        text. With `parallel`, pages are split across a process pool, which
+        only pays off when the whole of a long document is needed.
+        """
         if not os.path.exists(pdf_path):
             logger.error(f"PDF file not found: {pdf_path}")
             return ""
         
-        full_text = ""
+        if parallel and max_chars is None:
+            try:
+                return PDFService._extract_text_parallel(pdf_path)
+            except PDFBudgetExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Parallel PDF extraction failed, falling back to sequential: {e}")
+        
+        parts = []
+        length = 0
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n\n"
+            with closing(PDFService.iter_pages(pdf_path)) as pages:
+                for _, page_text in pages:
+                    parts.append(page_text + "\n\n")
+                    length += len(page_text) + 2
+                    if max_chars is not None and length >= max_chars:
+                        break
+        except PDFBudgetExceeded:
+            raise
         except Exception as e:
             logger.error(f"Failed to extract PDF text: {e}")
-        return full_text.strip()
+        return "".join(parts).strip()
+
+    @staticmethod
+    def _extract_text_parallel(pdf_path: str) -> str:
+        pages = PDFService._extract_pages_parallel(pdf_path)
+        return "".join(page_text + "\n\n" for page_text in pages.values()).strip()
+
+    @staticmethod
+    def _extract_pages_parallel(
+        pdf_path: str,
+        min_pages: int = PDF_PARALLEL_MIN_PAGES,
+        page_numbers: Optional[List[int]] = None,
+        budget: Optional[ParseBudget] = None
+    ) -> Dict[int, str]:
+        if page_numbers is None:
+            with _open_pdf(pdf_path) as pdf:
+                page_numbers = list(range(1, len(pdf.pages) + 1))
+        
+        if len(page_numbers) < min_pages and budget is None:
+            # Not worth shipping a short document to other processes, unless it must run under a budget
+            texts = _extract_page_numbers(pdf_path, page_numbers)
+            return {i: text for i, text in zip(page_numbers, texts) if text}
+        
+        for attempt in range(2):
+            pool = _get_process_pool()
+            try:
+                return PDFService._run_batches(pool, pdf_path, page_numbers, budget)
+            except BrokenProcessPool:
+                # A worker died mid-parse; start a new pool and give the document one more try
+                _discard_process_pool(pool)
+                if attempt:
+                    raise
+                logger.warning(f"PDF parse worker died, restarting the pool for {pdf_path}")
+        raise RuntimeError("unreachable")
+
+    @staticmethod
+    def _run_batches(
+        pool: ProcessPoolExecutor,
+        pdf_path: str,
+        page_numbers: List[int],
+        budget: Optional[ParseBudget]
+    ) -> Dict[int, str]:
+        batch = max(1, -(-len(page_numbers) // (PDF_PARSE_WORKERS * 4)))
+        batches = [page_numbers[start:start + batch] for start in range(0, len(page_numbers), batch)]
+        futures = [(numbers, pool.submit(_extract_page_numbers, pdf_path, numbers, budget)) for numbers in batches]
+        pages = {}
+        try:
+            for numbers, future in futures:
+                try:
+                    texts = future.result(timeout=budget.remaining() if budget else None)
+                except FutureTimeoutError:
+                    raise PDFBudgetExceeded(f"PDF parsing ran out of time before page {numbers[0]}")
+                for i, page_text in zip(numbers, texts):
+                    if page_text:
+                        pages[i] = page_text
+        finally:
+            # Batches still queued are dropped; running ones are interrupted at the deadline
+            for _, future in futures:
+                future.cancel()
+        return pages
     
     @staticmethod
-    def extract_text_by_pages(pdf_path: str) -> Dict[int, str]:
+    def extract_links(pdf_path: str) -> List[str]:
+        """URIs of every hyperlink annotation in the document.
+
+        Only reads each page's annotations, without the layout analysis that
+        text extraction needs.
+        """
+        links = []
+        if not os.path.isfile(pdf_path):
+            logger.error(f"PDF file not found: {pdf_path}")
+            return links
+        
+        try:
+            with _open_pdf(pdf_path) as pdf:
+                for _, page in _visit_pages(pdf):
+                    links.extend(link["uri"] for link in page.hyperlinks if link.get("uri"))
+        except Exception as e:
+            logger.error(f"Link extraction failed: {e}")
+        return links
+    
+    @staticmethod
+    def extract_text_by_pages(
+        pdf_path: str,
+        parallel: bool = False,
+        min_parallel_pages: int = PDF_PARALLEL_MIN_PAGES,
+        page_numbers: Optional[List[int]] = None,
+        budget: Optional[ParseBudget] = None
+    ) -> Dict[int, str]:
+        """Stripped text of every non-empty page, keyed by page number.
+
+        With `parallel`, documents of at least `min_parallel_pages` pages are
+        split across the process pool; this falls back to sequential parsing
+        if the pool fails. `page_numbers` limits parsing to those pages.
+        A `budget` is only enforced with `parallel`: the document then goes
+        to the pool whatever its length, PDFBudgetExceeded is raised if
+        parsing runs past it, and a pool failure is raised instead of
+        falling back to unbudgeted in-process parsing.
+        """
         pages = {}
         
         if not os.path.isfile(pdf_path):
             logger.error(f"Cannot find PDF file at: {pdf_path}")
             return pages
+        
+        if parallel:
+            try:
+                return {
+                    i: text.strip()
+                    for i, text in PDFService._extract_pages_parallel(pdf_path, min_parallel_pages, page_numbers, budget).items()
+                    if text.strip()
+                }
+            except PDFBudgetExceeded:
+                raise
+            except Exception as e:
+                if budget is not None:
+                    raise
+                logger.error(f"Parallel PDF extraction failed, falling back to sequential: {e}")
             
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
-                    if text and text.strip():
-                        pages[i] = text.strip()
+            for i, text in PDFService.iter_pages(pdf_path, page_numbers):
+                if text.strip():
+                    pages[i] = text.strip()
+        except PDFBudgetExceeded:
+            raise
         except Exception as e:
             logger.error(f"Text extraction failed: {e}")
             
@@ -58,8 +425,8 @@ class PDFService:
             return result
             
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages, 1):
+            with _open_pdf(pdf_path) as pdf:
+                for i, page in _visit_pages(pdf):
                     page_content = {}
                     
                     if extract_text:
@@ -78,6 +445,8 @@ class PDFService:
                     if page_content:
                         result[i] = page_content
                         
+        except PDFBudgetExceeded:
+            raise
         except Exception as e:
             logger.error(f"Content extraction error: {e}")
             
@@ -91,7 +460,7 @@ class PDFService:
             return {}
             
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with _open_pdf(pdf_path) as pdf:
                 return pdf.metadata or {}
         except Exception as e:
             logger.error(f"Metadata extraction failed: {e}")
@@ -105,7 +474,7 @@ class PDFService:
             return {}
             
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with _open_pdf(pdf_path) as pdf:
                 info = {
                     "pages": len(pdf.pages),
                     "metadata": pdf.metadata or {},
@@ -114,4 +483,17 @@ class PDFService:
                 return info
         except Exception as e:
             logger.error(f"Failed to get PDF info: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+
+_pdf_service: Optional[PDFService] = None
+_pdf_service_lock = threading.Lock()
+
+
+def get_pdf_service() -> PDFService:
+    """The process-wide PDFService"""
+    global _pdf_service
+    with _pdf_service_lock:
+        if _pdf_service is None:
+            _pdf_service = PDFService()
+        return _pdf_service
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# GitHub's hourly limit for an authenticated token, assumed until a response says otherwise
+DEFAULT_HOURLY_LIMIT = 5000
+# How long a token that reports no budget left is rested when the response gives no reset time
+EXHAUSTED_RETRY_SECONDS = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised instead of sleeping when no token has budget left for the caller"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"GitHub rate limit exhausted, retry in {int(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class _TokenBudget:
+    def __init__(self, token: str):
+        self.token = token
+        self.limit = DEFAULT_HOURLY_LIMIT
+        self.remaining = DEFAULT_HOURLY_LIMIT
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+
+    def refresh(self, now: float):
+        # Once the window has rolled over the budget is back to full until headers say otherwise
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.blocked_until and self.remaining > 0
+
+    def ready_at(self, now: float) -> float:
+        if self.blocked_until > now:
+            return self.blocked_until
+        return self.reset_at or now
+
+
+class RateLimitTracker:
+    """Process-wide view of the GitHub rate limit across every token and job.
+
+    Every response is fed back through `update()` so the tracker always knows
+    what is left in each token's window. `acquire()` hands out tokens
+    round-robin, and while several jobs are registered each one is held to an
+    equal share of the budget left in the current window. When nothing is
+    left it raises RateLimitExceeded with the time until budget returns,
+    so callers can defer the work instead of blocking a thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, _TokenBudget] = {}
+        self._cursor = 0
+        self._jobs: Dict[str, int] = {}
+        self._granted = 0
+        self._throttled = 0
+
+    def _budget(self, token: str) -> _TokenBudget:
+        budget = self._budgets.get(token)
+        if budget is None:
+            budget = self._budgets[token] = _TokenBudget(token)
+        return budget
+
+    def register_job(self, job_id: Optional[str]):
+        """Count the job towards fair sharing until release_job() is called"""
+        if job_id is not None:
+            with self._lock:
+                self._jobs.setdefault(job_id, 0)
+
+    def release_job(self, job_id: Optional[str]):
+        if job_id is not None:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    @contextmanager
+    def job(self, job_id: Optional[str]):
+        self.register_job(job_id)
+        try:
+            yield
+        finally:
+            self.release_job(job_id)
+
+    def _fair_share(self, budgets: List[_TokenBudget]) -> float:
+        remaining = sum(budget.remaining for budget in budgets)
+        return (remaining + sum(self._jobs.values())) / max(1, len(self._jobs))
+
+    def acquire(self, tokens: List[str], job_id: Optional[str] = None) -> str:
+        """Reserve one request against the next token with budget left"""
+        now = time.time()
+        with self._lock:
+            budgets = [self._budget(token) for token in tokens]
+            for budget in budgets:
+                budget.refresh(now)
+
+            if job_id in self._jobs and self._jobs[job_id] >= self._fair_share(budgets):
+                self._throttled += 1
+                raise RateLimitExceeded(self._retry_after(budgets, now))
+
+            for offset in range(len(budgets)):
+                budget = budgets[(self._cursor + offset) % len(budgets)]
+                if budget.available(now):
+                    self._cursor = (self._cursor + offset + 1) % len(budgets)
+                    budget.remaining -= 1
+                    self._granted += 1
+                    if job_id in self._jobs:
+                        self._jobs[job_id] += 1
+                    return budget.token
+
+            self._throttled += 1
+            raise RateLimitExceeded(self._retry_after(budgets, now))
+
+    def update(self, token: str, status_code: int, headers: Mapping[str, str]) -> bool:
+        """Record the rate-limit headers of a response. Returns True if it was rate limited."""
+        now = time.time()
+        with self._lock:
+            budget = self._budget(token)
+            limit = headers.get('X-RateLimit-Limit')
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            if limit is not None:
+                budget.limit = int(limit)
+            if remaining is not None:
+                budget.remaining = int(remaining)
+            if reset is not None:
+                reset_at = float(reset)
+                if reset_at > budget.reset_at:
+                    # A new window started, so earlier per-job usage no longer counts against it
+                    for job_id in self._jobs:
+                        self._jobs[job_id] = 0
+                budget.reset_at = reset_at
+            if budget.remaining <= 0 and budget.reset_at <= now:
+                # Spent with no reset time (missing or already past): without a window end, refresh()
+                # would never give the token its budget back, so retry it after a bounded wait
+                budget.reset_at = now + EXHAUSTED_RETRY_SECONDS
+
+            if status_code not in (403, 429):
+                return False
+
+            retry_after = headers.get('Retry-After')
+            if retry_after is not None:
+                # Secondary rate limit: GitHub says exactly how long to back off
+                budget.blocked_until = now + float(retry_after)
+            elif remaining is not None and int(remaining) == 0:
+                budget.blocked_until = budget.reset_at
+            else:
+                return False
+
+            logger.warning(f"GitHub token ...{token[-4:]} rate limited for {int(budget.blocked_until - now)}s")
+            return True
+
+    def retry_after(self, tokens: List[str]) -> float:
+        """Seconds until at least one of the tokens has budget again"""
+        now = time.time()
+        with self._lock:
+            return self._retry_after([self._budget(token) for token in tokens], now)
+
+    def _retry_after(self, budgets: List[_TokenBudget], now: float) -> float:
+        ready_at = min((budget.ready_at(now) for budget in budgets), default=now)
+        return max(1.0, ready_at - now)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            return {
+                'active_jobs': len(self._jobs),
+                'granted': self._granted,
+                'throttled': self._throttled,
+                'tokens': [
+                    {
+                        'token': f"...{budget.token[-4:]}",
+                        'limit': budget.limit,
+                        'remaining': budget.remaining,
+                        'resets_in': max(0, int(budget.reset_at - now)) if budget.reset_at else None,
+                        'blocked_for': max(0, int(budget.blocked_until - now)),
+                    }
+                    for budget in self._budgets.values()
+                ],
+            }
+
+
+rate_limiter = RateLimitTracker()
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Entries dropped per query while evicting
+_EVICT_BATCH = 100
+
+
+class SQLiteCache:
+    """Small persistent key/value cache stored in its own SQLite file.
+
+    Values are JSON-encoded. Entries older than `ttl` seconds are treated as
+    missing, and once the stored values exceed `max_bytes` the least recently
+    read entries are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path: str, table: str, ttl: float, max_bytes: int):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_accessed_at ON {table} (accessed_at)")
+        # Running total of the stored value sizes, so set() never has to sum the table. It counts only
+        # this connection's writes; another process sharing the file is reconciled on its next open.
+        self._size = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        encoded = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now)
+            )
+            self._size += len(encoded) - (previous[0] if previous else 0)
+            self._evict()
+
+    def touch(self, key: str):
+        """Restart the TTL of an entry that was revalidated"""
+        with self._lock:
+            self._conn.execute(f"UPDATE {self.table} SET stored_at = ? WHERE key = ?", (time.time(), key))
+
+    def _delete(self, key: str):
+        row = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._size -= row[0]
+
+    def _evict(self):
+        # Drop least recently read entries, a batch at a time off the accessed_at index, until we are back under the limit
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed_at LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            stale = []
+            for key, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                stale.append((key,))
+                self._size -= size
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale)
+            self.evictions += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            size = self._size
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'size_bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,83 @@
+"""Job worker processes for the database-backed queue.
+
+Each process claims pending jobs and job groups from the database and runs
+them on `--threads` threads, so PDF parsing and extraction scale across
+cores instead of sharing the API's GIL. Run as many of these, on as many
+hosts, as the database can serve:
+
+    JOB_QUEUE_BACKEND=database uv run python -m src.worker --processes 4 --threads 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.config import WORKER_COUNT
+
+
+def run_worker(threads: int):
+    """Claim and run jobs until SIGTERM or SIGINT"""
+    from src.api.routes.documents import process_pdf
+    from src.api.routes.groups import process_group
+    from src.services.db_queue import DatabaseJobQueue
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    queue = DatabaseJobQueue(process_pdf, num_workers=threads)
+    queue.register_group_handler(process_group)
+
+    def _shutdown(signum, frame):
+        queue.stop()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    queue.start()
+    queue.wait()
+
+
+def run_pool(processes: int, threads: int):
+    """Run `processes` worker processes, restarting any that die, until told to stop"""
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def _start(index: int):
+        process = context.Process(target=run_worker, args=(threads,), name=f"job-worker-process-{index}")
+        process.start()
+        return process
+
+    def _shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in pool:
+            if process.is_alive():
+                process.terminate()
+
+    pool = [_start(i) for i in range(processes)]
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    print(f"Started {processes} worker processes with {threads} job threads each")
+
+    while not stopping:
+        for i, process in enumerate(pool):
+            process.join(1.0 / len(pool))
+            if not process.is_alive() and not stopping:
+                # Jobs it held are taken over by the others once their leases run out
+                print(f"Worker process {process.pid} exited with {process.exitcode}, restarting")
+                pool[i] = _start(i)
+    for process in pool:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job workers for the database-backed queue")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=WORKER_COUNT, help="job threads per process (default: WORKER_COUNT)")
+    args = parser.parse_args()
+    run_pool(max(1, args.processes), max(1, args.threads))
+
+
+if __name__ == "__main__":
+    main()